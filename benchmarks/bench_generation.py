@@ -0,0 +1,133 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.mock_llm_server import MockConfig, MockLLMServer
+from generation.dispatch import MISSING_OVERVIEW, process_data
+from generation.parsing import is_error
+from generation.prompts import PROMPTS, load_rows
+from generation.providers import AzureProvider, GeminiProvider, OpenAICompatibleProvider, Provider
+
+INPUT_FILE = 'datasets/Final dataset(Sheet1).csv'
+
+# USD per 1M (input, output) tokens, for rough cost estimates only; update to current list prices
+PRICES = {
+    'azure': (1.25, 10.00),
+    'gemini': (0.30, 2.50),
+    'groq': (0.05, 0.08),
+}
+
+
+def build_provider(name: str, url: str, max_in_flight: int, requests_per_minute: float) -> Provider:
+    kwargs = dict(requests_per_minute=requests_per_minute, max_in_flight=max_in_flight)
+    if name == 'azure':
+        return AzureProvider('gpt-5-chat', 'mock-key', endpoint=url, **kwargs)
+    if name == 'gemini':
+        return GeminiProvider('gemini-2.5-flash-preview-09-2025', 'mock-key', base_url=url, **kwargs)
+    return OpenAICompatibleProvider('llama-3.1-8b-instant', 'mock-key', base_url=url, **kwargs)
+
+
+def bench_rows(n_titles: int) -> List[Dict[str, str]]:
+    # The real sheet, repeated (with distinct titles) until it has n_titles rows
+    rows = load_rows(INPUT_FILE)
+    out = []
+    while len(out) < n_titles:
+        for row in rows[:n_titles - len(out)]:
+            out.append(dict(row, **{'Chinese Title': f"{row.get('Chinese Title', '')}{len(out)}"}))
+    return out
+
+
+def run_once(server: MockLLMServer, name: str, rows: List[Dict[str, str]], max_in_flight: int,
+             requests_per_minute: float) -> Dict[str, Any]:
+    provider = build_provider(name, server.url, max_in_flight, requests_per_minute)
+    # Shorter client backoff than production so injected 429s cost benchmark time, not minutes
+    provider.limiter.base_backoff, provider.limiter.max_backoff = 0.1, 2.0
+    latencies = []
+
+    def call_api(user_query: str, **kwargs) -> str:
+        start = time.perf_counter()
+        try:
+            return provider.call(user_query, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    server.reset_stats()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = process_data(rows, PROMPTS, call_api, max_in_flight, cache=None, provider=name)
+    elapsed = time.perf_counter() - start
+
+    stats = server.stats
+    errors = sum(is_error(r['Prompt_Response']) and r['Prompt_Response'] != MISSING_OVERVIEW
+                 for rs in results.values() for r in rs)
+    latency = np.array(latencies) if latencies else np.zeros(1)
+    price_in, price_out = PRICES[name]
+    return {
+        'provider': name,
+        'max_in_flight': max_in_flight,
+        'calls': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'calls_per_sec': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(float(np.percentile(latency, 50)) * 1000, 1),
+        'p95_ms': round(float(np.percentile(latency, 95)) * 1000, 1),
+        'p99_ms': round(float(np.percentile(latency, 99)) * 1000, 1),
+        # Every HTTP request beyond one per call is a retry (429s and 5xx)
+        'http_requests': stats.requests,
+        'retries': stats.requests - len(latencies),
+        'rate_limited': stats.rate_limited,
+        'prompt_tokens': stats.prompt_tokens,
+        'completion_tokens': stats.completion_tokens,
+        'est_cost_usd': round((stats.prompt_tokens * price_in + stats.completion_tokens * price_out) / 1e6, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generation path against a local mock LLM server.")
+    parser.add_argument('--providers', nargs='+', choices=sorted(PRICES), default=sorted(PRICES))
+    parser.add_argument('--titles', type=int, default=81)
+    parser.add_argument('--max-in-flight', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--client-rpm', type=float, default=100000, help="Client-side rate limit")
+    parser.add_argument('--latency', choices=['lognormal', 'uniform', 'fixed'], default='lognormal')
+    parser.add_argument('--latency-median', type=float, default=0.2)
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-429-rate', type=float, default=0.05)
+    parser.add_argument('--retry-after', type=float, default=0.2)
+    parser.add_argument('--server-rpm', type=float, default=None, help="Server-side quota in requests per minute")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history', default=None, help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.latency_median, args.latency_sigma, args.error_429_rate,
+                        args.retry_after, args.server_rpm, seed=args.seed)
+    rows = bench_rows(args.titles)
+    results = []
+    with MockLLMServer(config) as server:
+        for name in args.providers:
+            for max_in_flight in args.max_in_flight:
+                result = run_once(server, name, rows, max_in_flight, args.client_rpm)
+                results.append(result)
+                print(json.dumps(result))
+
+    columns = ['provider', 'max_in_flight', 'calls', 'calls_per_sec', 'p50_ms', 'p95_ms', 'p99_ms',
+               'retries', 'errors', 'est_cost_usd']
+    print()
+    print('  '.join(f"{c:>13}" for c in columns))
+    for result in results:
+        print('  '.join(f"{result[c]:>13}" for c in columns))
+
+    if args.history:
+        os.makedirs(os.path.dirname(args.history) or '.', exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(dict(result, timestamp=time.time(), config=config.__dict__)) + '\n')
+
+
+if __name__ == "__main__":
+    main()
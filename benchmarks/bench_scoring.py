@@ -0,0 +1,181 @@
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from scoring.conditions import CONDITIONS, load_conditions
+
+HISTORY_FILE = 'benchmarks/results/scoring_history.jsonl'
+SCALES = [1000, 10000, 100000]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is kilobytes on Linux and bytes on macOS; it is the peak so far for this process
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def available_metrics() -> List[str]:
+    metrics = ['psr']
+    if importlib.util.find_spec('sentence_transformers'):
+        metrics.append('cosine')
+    if importlib.util.find_spec('evaluate') and importlib.util.find_spec('torch'):
+        metrics += ['bleurt', 'bertscore']
+    return metrics
+
+
+def synthesize(n_rows: int, directory: str, seed: int = 0) -> List[tuple]:
+    # Writes 9 condition CSVs with n_rows in total, resampled from the real ones. Predictions get a random word
+    # dropped or repeated, so most synthetic pairs are distinct strings and dedupe does not flatter the numbers.
+    rng = np.random.default_rng(seed)
+    per_condition = max(1, n_rows // len(CONDITIONS))
+    conditions = []
+    for path, model, prompt in CONDITIONS:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        sample = df.iloc[rng.integers(0, len(df), per_condition)].reset_index(drop=True)
+        predictions = []
+        for text in sample.iloc[:, 3]:
+            words = text.split()
+            if len(words) > 1:
+                i = int(rng.integers(0, len(words)))
+                words = words[:i] + words[i + 1:] if rng.random() < 0.5 else words[:i + 1] + words[i:]
+            predictions.append(' '.join(words))
+        sample.iloc[:, 3] = predictions
+        # Distinct titles per copy, so title ids and pairing behave as in a larger dataset
+        sample.iloc[:, 1] = sample.iloc[:, 1] + '#' + sample.index.astype(str)
+        out = os.path.join(directory, os.path.basename(path))
+        sample.to_csv(out, index=False, encoding='utf-8-sig')
+        conditions.append((out, model, prompt))
+    return conditions
+
+
+def bench_scale(n_rows: int, metrics: List[str], options: Dict[str, Any], seed: int) -> List[Dict[str, Any]]:
+    # Runs in its own process, so the peak RSS reported belongs to this scale alone
+    from scoring.metrics import METRICS
+    from scoring.report import summarize
+    from scoring.results import ResultsStore
+    from scoring.storage import default_format, write_scores
+    # Imported up front so one-off import time is not charged to the first stage that needs it
+    import scipy.stats  # noqa: F401
+
+    records = []
+
+    def timed(stage, metric, fn):
+        start = time.perf_counter()
+        value = fn()
+        records.append({'scale': n_rows, 'stage': stage, 'metric': metric,
+                        'seconds': round(time.perf_counter() - start, 4), 'peak_rss_mb': peak_rss_mb()})
+        return value
+
+    with tempfile.TemporaryDirectory() as directory:
+        conditions = timed('synthesize', None, lambda: synthesize(n_rows, directory, seed))
+        table = timed('load', None, lambda: load_conditions(conditions))
+
+        frames = []
+        for name in metrics:
+            if name == 'cosine':
+                # Split the cold encode from the scoring so the two can be tracked separately
+                from scoring.embeddings import encode_texts, paired_cosine
+                from scoring.embedding_store import EmbeddingStore
+                from scoring.metrics import sentence_model
+                model_name = options.get('embedding_model', 'all-MiniLM-L6-v2')
+                store = EmbeddingStore(os.path.join(directory, 'embeddings'), model_name)
+                refs, preds = table['reference'].tolist(), table['prediction'].tolist()
+                embeddings, index = timed('encode', name, lambda: store.embed(
+                    refs + preds, lambda missing: encode_texts(sentence_model(model_name), missing)))
+                scores = {'cosine': timed('score', name, lambda: paired_cosine(
+                    embeddings, [index[t] for t in refs], [index[t] for t in preds]))}
+            else:
+                scores = timed('score', name, lambda: METRICS[name](table, **options))
+            for output, values in scores.items():
+                frames.append(table[['title_id', 'english_title', 'chinese_title', 'model', 'prompt']]
+                              .assign(metric=output, score=np.asarray(values, dtype=np.float32)))
+
+        results = pd.concat(frames, ignore_index=True)
+        timed('aggregate', None, lambda: summarize(ResultsStore(results)))
+        fmt = default_format()
+        timed(f'write_{fmt}', None, lambda: write_scores(results, os.path.join(directory, 'scores'), fmt))
+
+    for record in records:
+        record['rows'] = len(table)
+    return records
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(records: List[Dict[str, Any]], history: List[Dict[str, Any]], threshold: float) -> List[str]:
+    # A stage regresses when it is slower than threshold x the median of earlier runs at the same scale
+    found = []
+    for record in records:
+        key = (record['scale'], record['stage'], record['metric'], json.dumps(record['options'], sort_keys=True))
+        earlier = [h['seconds'] for h in history
+                   if (h['scale'], h['stage'], h['metric'], json.dumps(h.get('options'), sort_keys=True)) == key]
+        if earlier and record['seconds'] > threshold * float(np.median(earlier)) and record['seconds'] > 0.05:
+            found.append(f"{record['stage']} {record['metric'] or ''} @ {record['scale']}: {record['seconds']:.3f}s "
+                         f"vs median {np.median(earlier):.3f}s")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every scoring stage on synthetic condition files.")
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES, help="Total rows across the 9 conditions")
+    parser.add_argument('--metrics', nargs='+', default=None, help="Defaults to every metric whose dependencies are installed")
+    parser.add_argument('--psr-backend', choices=['fuzzywuzzy', 'rapidfuzz'], default='fuzzywuzzy')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--fail-on-regression', type=float, default=None, metavar='RATIO',
+                        help="Exit non-zero when a stage is RATIO x slower than its historical median")
+    args = parser.parse_args()
+
+    metrics = args.metrics or available_metrics()
+    options = {'psr_backend': args.psr_backend}
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history, 'r', encoding='utf-8') as f:
+            history = [json.loads(line) for line in f if line.strip()]
+
+    run = {'timestamp': time.time(), 'commit': git_commit(), 'python': platform.python_version(),
+           'cpus': os.cpu_count(), 'options': options}
+    records = []
+    for scale in args.scales:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            scale_records = pool.submit(bench_scale, scale, metrics, options, args.seed).result()
+        for record in scale_records:
+            print(f"{record['rows']:>8} rows  {record['stage']:<12} {record['metric'] or '':<10} "
+                  f"{record['seconds']:>9.3f}s  peak {record['peak_rss_mb']:>8.1f} MB")
+        records += [dict(run, **record) for record in scale_records]
+
+    os.makedirs(os.path.dirname(args.history) or '.', exist_ok=True)
+    with open(args.history, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    print(f"Appended {len(records)} records to: {args.history}")
+
+    if args.fail_on_regression:
+        found = regressions(records, history, args.fail_on_regression)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+import argparse
+import email.parser
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass
+class MockConfig:
+    # Latency is drawn per request: 'lognormal' (median, sigma), 'uniform' (0..2 x median) or 'fixed'
+    latency: str = 'lognormal'
+    latency_median: float = 0.4
+    latency_sigma: float = 0.5
+    error_429_rate: float = 0.05       # Share of requests rejected with 429 on top of the rpm limit
+    retry_after: float = 0.5           # Seconds advertised in Retry-After / retryDelay
+    requests_per_minute: Optional[float] = None    # Server-side quota; requests over it get a 429
+    error_5xx_rate: float = 0.0
+    completion_tokens: int = 40
+    echo: bool = False                 # Answer with the prompt itself, so tests can check replies land on their rows
+    batch_error_rate: float = 0.0      # Share of batch lines that end up in the error file instead of the output
+    batch_polls: int = 1               # Status checks that see 'in_progress' before a batch completes
+    seed: Optional[int] = None
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    ok: int = 0
+    rate_limited: int = 0
+    server_errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    files: int = 0
+    batches: int = 0
+    peak_in_flight: int = 0            # Most chat requests the server was handling at once
+    by_format: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def count_tokens(text: str) -> int:
+    # Rough tokenizer stand-in: CJK characters count one each, other text about four characters per token
+    cjk = len(re.findall(r'[一-鿿]', text))
+    return cjk + max(1, (len(text) - cjk) // 4)
+
+
+def parse_multipart(content_type: str, body: bytes) -> Dict[str, bytes]:
+    message = email.parser.BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    return {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+            for part in message.get_payload()}
+
+
+class MockLLMServer:
+    # Local HTTP server answering Azure chat-completions, Gemini generateContent and OpenAI/Groq chat-completions,
+    # plus the OpenAI/Azure files and batches endpoints, kept as files under batch_dir so a batch outlives a restart
+    def __init__(self, config: Optional[MockConfig] = None, host: str = '127.0.0.1', port: int = 0,
+                 batch_dir: Optional[str] = None):
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self.lock = threading.Lock()
+        self.rng = random.Random(self.config.seed)
+        self.window = []
+        self.in_flight = 0
+        self.batch_dir = batch_dir or tempfile.mkdtemp(prefix='mock_batches_')
+        os.makedirs(self.batch_dir, exist_ok=True)
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockLLMServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'MockLLMServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = MockStats()
+            self.window = []
+
+    def _enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def _latency(self) -> float:
+        c = self.config
+        with self.lock:
+            if c.latency == 'fixed':
+                return c.latency_median
+            if c.latency == 'uniform':
+                return self.rng.uniform(0, 2 * c.latency_median)
+            return self.rng.lognormvariate(0, c.latency_sigma) * c.latency_median
+
+    def _admit(self) -> Tuple[bool, bool]:
+        # Returns (rate_limited, server_error) for one incoming request
+        c = self.config
+        now = time.monotonic()
+        with self.lock:
+            self.stats.requests += 1
+            if c.requests_per_minute:
+                self.window = [t for t in self.window if now - t < 60.0]
+                if len(self.window) >= c.requests_per_minute:
+                    return True, False
+                self.window.append(now)
+            if self.rng.random() < c.error_429_rate:
+                return True, False
+            return False, self.rng.random() < c.error_5xx_rate
+
+    def _record(self, wire_format: str, rate_limited: bool, server_error: bool, prompt: int, completion: int):
+        with self.lock:
+            self.stats.by_format[wire_format] = self.stats.by_format.get(wire_format, 0) + 1
+            if rate_limited:
+                self.stats.rate_limited += 1
+            elif server_error:
+                self.stats.server_errors += 1
+            else:
+                self.stats.ok += 1
+                self.stats.prompt_tokens += prompt
+                self.stats.completion_tokens += completion
+
+    def _reply(self, prompt: str) -> str:
+        return f"Mock English Title for {prompt}" if self.config.echo else "Mock English Title"
+
+    def _path(self, object_id: str) -> str:
+        # Ids come from the URL; only the generated file-/batch_ form is accepted
+        if not re.fullmatch(r'(file|batch)_[0-9a-f]{24}', object_id):
+            raise KeyError(object_id)
+        return os.path.join(self.batch_dir, object_id + ('.jsonl' if object_id.startswith('file') else '.json'))
+
+    def _save_file(self, data: bytes) -> str:
+        file_id = f"file_{uuid.uuid4().hex[:24]}"
+        with open(self._path(file_id), 'wb') as f:
+            f.write(data)
+        with self.lock:
+            self.stats.files += 1
+        return file_id
+
+    def _save_batch(self, batch: Dict[str, Any]):
+        with open(self._path(batch['id']), 'w', encoding='utf-8') as f:
+            json.dump(batch, f)
+
+    def _load_batch(self, batch_id: str) -> Dict[str, Any]:
+        with open(self._path(batch_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def create_batch(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        if not os.path.exists(self._path(body['input_file_id'])):
+            raise KeyError(body['input_file_id'])
+        batch = {'id': f"batch_{uuid.uuid4().hex[:24]}", 'object': 'batch', 'endpoint': body.get('endpoint'),
+                 'input_file_id': body['input_file_id'], 'status': 'validating', 'polls': 0,
+                 'created_at': int(time.time()), 'request_counts': {'total': 0, 'completed': 0, 'failed': 0}}
+        self._save_batch(batch)
+        with self.lock:
+            self.stats.batches += 1
+        return batch
+
+    def poll_batch(self, batch_id: str) -> Dict[str, Any]:
+        # Stays in progress for batch_polls checks, then answers every line at once
+        batch = self._load_batch(batch_id)
+        if batch['status'] in ('validating', 'in_progress'):
+            batch['polls'] += 1
+            batch['status'] = 'in_progress'
+            if batch['polls'] > self.config.batch_polls:
+                self._complete(batch)
+            self._save_batch(batch)
+        return batch
+
+    def _complete(self, batch: Dict[str, Any]):
+        with open(self._path(batch['input_file_id']), 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        outputs, errors = [], []
+        for line in lines:
+            body = line['body']
+            prompt = ' '.join(m.get('content', '') for m in body.get('messages', []))
+            entry = {'id': f"batch_req_{uuid.uuid4().hex[:24]}", 'custom_id': line['custom_id']}
+            with self.lock:
+                failed = self.rng.random() < self.config.batch_error_rate
+            if failed:
+                errors.append(dict(entry, response=None,
+                                   error={'code': 'server_error', 'message': 'Mock batch line failed'}))
+                continue
+            prompt_tokens, completion_tokens = count_tokens(prompt), self.config.completion_tokens
+            outputs.append(dict(entry, error=None, response={'status_code': 200, 'request_id': entry['id'], 'body': {
+                "id": "chatcmpl-mock", "object": "chat.completion", "model": body.get('model', 'mock'),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": self._reply(prompt)},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens}}}))
+        # Real batch output is not in input order, so clients have to map results back by custom_id
+        with self.lock:
+            self.rng.shuffle(outputs)
+        for key, entries in (('output_file_id', outputs), ('error_file_id', errors)):
+            batch[key] = self._save_file(''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in entries)
+                                         .encode('utf-8')) if entries else None
+        batch['status'] = 'completed'
+        batch['request_counts'] = {'total': len(lines), 'completed': len(outputs), 'failed': len(errors)}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                parts = path.rstrip('/').split('/')
+                try:
+                    if len(parts) >= 3 and parts[-3] == 'files' and parts[-1] == 'content':
+                        with open(server._path(parts[-2]), 'rb') as f:
+                            data = f.read()
+                        self.send_response(200)
+                        self.send_header('Content-Type', 'application/jsonl')
+                        self.send_header('Content-Length', str(len(data)))
+                        self.end_headers()
+                        self.wfile.write(data)
+                        return
+                    if len(parts) >= 2 and parts[-2] == 'batches':
+                        self._send(200, server.poll_batch(parts[-1]))
+                        return
+                except (KeyError, FileNotFoundError):
+                    self._send(404, {"error": {"message": f"No such object {parts[-1]}"}})
+                    return
+                self._send(404, {"error": {"message": f"Unknown route {path}"}})
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                path = self.path.split('?')[0]
+                if path.endswith('/files'):
+                    upload = parse_multipart(self.headers.get('Content-Type', ''), raw)
+                    file_id = server._save_file(upload['file'])
+                    self._send(200, {"id": file_id, "object": "file", "purpose": upload.get('purpose', b'').decode(),
+                                     "bytes": len(upload['file'])})
+                    return
+                body = json.loads(raw or b'{}')
+                if path.endswith('/batches'):
+                    try:
+                        self._send(200, server.create_batch(body))
+                    except KeyError:
+                        self._send(404, {"error": {"message": f"No such file {body.get('input_file_id')}"}})
+                    return
+                if ':generateContent' in path:
+                    wire_format = 'gemini'
+                    prompt = ' '.join(p.get('text', '') for c in body.get('contents', []) for p in c.get('parts', []))
+                elif path.endswith('/chat/completions'):
+                    wire_format = 'azure' if '/openai/deployments/' in path else 'openai'
+                    prompt = ' '.join(m.get('content', '') for m in body.get('messages', []))
+                else:
+                    self._send(404, {"error": {"message": f"Unknown route {path}"}})
+                    return
+
+                server._enter()
+                try:
+                    self._chat(wire_format, body, prompt)
+                finally:
+                    server._exit()
+
+            def _chat(self, wire_format: str, body: Dict[str, Any], prompt: str):
+                rate_limited, server_error = server._admit()
+                config = server.config
+                prompt_tokens, completion_tokens = count_tokens(prompt), config.completion_tokens
+                server._record(wire_format, rate_limited, server_error, prompt_tokens, completion_tokens)
+
+                if rate_limited:
+                    if wire_format == 'gemini':
+                        self._send(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "details": [
+                            {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{config.retry_after}s"}]}})
+                    else:
+                        self._send(429, {"error": {"message": "Rate limit reached"}},
+                                   {'Retry-After': f"{config.retry_after}",
+                                    'retry-after-ms': f"{int(config.retry_after * 1000)}"})
+                    return
+
+                time.sleep(server._latency())
+                if server_error:
+                    self._send(503, {"error": {"message": "Service unavailable"}})
+                    return
+
+                text = server._reply(prompt)
+                if wire_format == 'gemini':
+                    self._send(200, {
+                        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}],
+                        "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens,
+                                          "totalTokenCount": prompt_tokens + completion_tokens}
+                    })
+                else:
+                    self._send(200, {
+                        "id": "chatcmpl-mock", "object": "chat.completion", "model": body.get('model', 'mock'),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                  "total_tokens": prompt_tokens + completion_tokens}
+                    })
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock Azure / Gemini / OpenAI-compatible chat endpoints.")
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--latency', choices=['lognormal', 'uniform', 'fixed'], default='lognormal')
+    parser.add_argument('--latency-median', type=float, default=0.4)
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-429-rate', type=float, default=0.05)
+    parser.add_argument('--requests-per-minute', type=float, default=None)
+    parser.add_argument('--batch-dir', default=None, help="Where uploaded files and batches are kept")
+    parser.add_argument('--batch-error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.latency_median, args.latency_sigma, args.error_429_rate,
+                        requests_per_minute=args.requests_per_minute, batch_error_rate=args.batch_error_rate)
+    server = MockLLMServer(config, port=args.port, batch_dir=args.batch_dir)
+    print(f"Mock LLM server on {server.url} (Azure: /openai/deployments/<model>/chat/completions, "
+          f"Gemini: /models/<model>:generateContent, OpenAI/Groq: /chat/completions, "
+          f"batches: /files, /batches under {server.batch_dir})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,9 @@
 """
 
 import pandas as pd
-import evaluate
-import torch
-import numpy as np
+
+from scoring.semantic import SemanticScorer
+from scoring.server import ScoringClient
 
 
 
@@ -29,52 +29,44 @@ PRED_COL_IDX = 3 # prediction
 BERTSCORE_LANG = "en"
 BERTSCORE_MODEL = None
 BLEURT_CHECKPOINT = "bleurt-20"
+BATCH_SIZE = 64      # pairs per forward pass for both metrics
+NUM_THREADS = None   # CPU threads for torch / BERTScore; None keeps the torch default
+INFERENCE_BACKEND = "fp32"   # "int8" for quantized CPU scoring; check agreement with `python cli.py check-backend`
+SCORING_SERVER = None   # e.g. '127.0.0.1:8765' to score on a running `python cli.py serve` with warm models
 
 
 def main():
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"Using device: {device}")
-
-    bleurt = evaluate.load("bleurt", checkpoint=BLEURT_CHECKPOINT)
-    bertscore = evaluate.load("bertscore")
-    combined_scores = {}
-
+    # Falls back to loading the models in this process when no server is running
+    scorer = ScoringClient.connect(SCORING_SERVER, bleurt_checkpoint=BLEURT_CHECKPOINT, bertscore_model=BERTSCORE_MODEL,
+                                   semantic_batch_size=BATCH_SIZE, num_threads=NUM_THREADS,
+                                   inference_backend=INFERENCE_BACKEND) \
+        or SemanticScorer(BLEURT_CHECKPOINT, BERTSCORE_MODEL, BERTSCORE_LANG,
+                          batch_size=BATCH_SIZE, num_threads=NUM_THREADS, backend=INFERENCE_BACKEND)
+
+    conditions = {}
+    keys_by_tag = {}
     for input_csv in INPUT_CSVS:
         tag = input_csv.split("/")[-1].replace(".csv", "")
-        print(f"\nProcessing: {tag}")
+        print(f"Loading: {tag}")
 
         df = pd.read_csv(input_csv)
 
         references = df.iloc[:, REF_COL_IDX].astype(str).fillna("").str.strip().tolist()
         predictions = df.iloc[:, PRED_COL_IDX].astype(str).fillna("").str.strip().tolist()
 
-        keys = list(zip(
+        conditions[tag] = (references, predictions)
+        keys_by_tag[tag] = list(zip(
             df.iloc[:, KEY_COL_1].astype(str),
             df.iloc[:, KEY_COL_2].astype(str)
         ))
 
-        # ---- BLEURT ----
-        bleurt_result = bleurt.compute(
-            predictions=predictions,
-            references=references
-        )
-        bleurt_scores = np.array(bleurt_result["scores"])
-
-        # ---- BERTScore ----
-        bert_kwargs = dict(
-            predictions=predictions,
-            references=references,
-            lang=BERTSCORE_LANG,
-            device=device
-        )
-        if BERTSCORE_MODEL is not None:
-            bert_kwargs["model_type"] = BERTSCORE_MODEL
-
-        bert_result = bertscore.compute(**bert_kwargs)
-        bert_f1 = np.array(bert_result["f1"])
-
-        # ---- Store per-case results ----
-        for k, b, f1 in zip(keys, bleurt_scores, bert_f1):
+    # ---- BLEURT + BERTScore over all conditions in one pass ----
+    scores = scorer.score_conditions(conditions)
+
+    # ---- Store per-case results ----
+    combined_scores = {}
+    for tag, keys in keys_by_tag.items():
+        for k, b, f1 in zip(keys, scores[tag]["BLEURT"], scores[tag]["BERTScore_F1"]):
             if k not in combined_scores:
                 combined_scores[k] = {
                     "Column 1": k[0],
@@ -1,9 +1,8 @@
 import csv
-import os
-from sentence_transformers import SentenceTransformer, util
 import collections
-import statistics 
-from math import fabs 
+
+from scoring.embedding_store import EmbeddingStore
+from scoring.embeddings import encode_texts, paired_cosine
 
 FILE_NAMES = [
     'datasets/Gemini_Culture-aware.csv', 'datasets/Gemini_Title_and_Synopsis.csv', 'datasets/Gemini_Title-only.csv', 
@@ -17,54 +16,75 @@ COLUMN_INDEX_A = 0
 COLUMN_INDEX_B = 3
 KEY_COLUMN_INDICES = [0, 1]
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL_NAME = 'all-MiniLM-L6-v2'
+BATCH_SIZE = 256    # Sentences per forward pass
+EMBEDDING_STORE_DIR = 'datasets/embeddings'    # Cached vectors; only unseen texts are encoded
 
-agg_scores = collections.defaultdict(lambda: {name: '' for name in FILE_NAMES})
-total_processed_rows = 0
-successful_files = 0
 
-for fn in FILE_NAMES:
+def read_rows(fn):
     with open(fn, 'r', newline='', encoding='utf-8-sig') as f_in:
         reader = csv.reader(f_in)
-        
         header = next(reader)
-        rows = list(reader)
-        current_rows = 0
-        
+        return list(reader)
+
+
+def main():
+    file_rows = {fn: read_rows(fn) for fn in FILE_NAMES}
+
+    # Encode every distinct reference and prediction across all files in one batched pass
+    texts = []
+    for rows in file_rows.values():
         for row in rows:
-            key = (row[KEY_COLUMN_INDICES[0]], row[KEY_COLUMN_INDICES[1]])
-            text_a = row[COLUMN_INDEX_A] # Column 1
-            text_b = row[COLUMN_INDEX_B] # Column 4
+            texts.append(row[COLUMN_INDEX_A]) # Column 1
+            texts.append(row[COLUMN_INDEX_B]) # Column 4
+    # The model (and torch) is only imported and loaded when the store is missing some of the texts
+    def encode(missing):
+        from sentence_transformers import SentenceTransformer
+        return encode_texts(SentenceTransformer(MODEL_NAME), missing, BATCH_SIZE)
+
+    store = EmbeddingStore(EMBEDDING_STORE_DIR, MODEL_NAME)
+    embeddings, index = store.embed(texts, encode)
+
+    agg_scores = collections.defaultdict(lambda: {name: '' for name in FILE_NAMES})
+    total_processed_rows = 0
+    successful_files = 0
+
+    for fn, rows in file_rows.items():
+        index_a = [index[row[COLUMN_INDEX_A]] for row in rows]
+        index_b = [index[row[COLUMN_INDEX_B]] for row in rows]
+        scores = paired_cosine(embeddings, index_a, index_b)
 
-            embeddings = model.encode([text_a, text_b], convert_to_tensor=True)
-            score = util.cos_sim(embeddings[0], embeddings[1]).item()
-            
+        for row, score in zip(rows, scores):
+            key = (row[KEY_COLUMN_INDICES[0]], row[KEY_COLUMN_INDICES[1]])
             agg_scores[key][fn] = f"{score:.4f}"
-            current_rows += 1
-                
-        if current_rows > 0:
-            total_processed_rows += current_rows
+
+        if rows:
+            total_processed_rows += len(rows)
             successful_files += 1
         else:
             print(f"WARNING: File '{fn}' processed, but yielded 0 valid rows for similarity calculation.")
 
-output_header = [
-    'Column 1', 
-    'Column 2',
-] + [name.split('/')[1] for name in FILE_NAMES]
-
-output_rows = []
-for key, scores in agg_scores.items():
-    row = list(key)
-    for fn in FILE_NAMES:
-        row.append(scores.get(fn, '')) 
-
-    output_rows.append(row)
-
-if output_rows:
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8-sig') as f_out:
-        writer = csv.writer(f_out)
-        writer.writerow(output_header)
-        writer.writerows(output_rows)
-else:
-        print("\n No output file written.")
\ No newline at end of file
+    output_header = [
+        'Column 1', 
+        'Column 2',
+    ] + [name.split('/')[1] for name in FILE_NAMES]
+
+    output_rows = []
+    for key, scores in agg_scores.items():
+        row = list(key)
+        for fn in FILE_NAMES:
+            row.append(scores.get(fn, '')) 
+
+        output_rows.append(row)
+
+    if output_rows:
+        with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8-sig') as f_out:
+            writer = csv.writer(f_out)
+            writer.writerow(output_header)
+            writer.writerows(output_rows)
+    else:
+        print("\n No output file written.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import csv
 import os
 import collections
-from fuzzywuzzy import fuzz 
+
+from scoring.csi_index import CSIIndex
+from scoring.psr import psr_scores
 
 FILE_NAMES = [
     'datasets/Gemini_Culture-aware.csv', 'datasets/Gemini_Title_and_Synopsis.csv', 'datasets/Gemini_Title-only.csv', 
@@ -12,23 +14,18 @@ FILE_NAMES = [
 OUTPUT_FILE = "datasets/combined_psr_scores.csv"
 
 COLUMN_INDEX_REFERENCE = 0
+COLUMN_INDEX_CHINESE = 1
 COLUMN_INDEX_GENERATED = 3
 KEY_COLUMN_INDICES = [0, 1] 
 CSI_TERMS = [] 
+# 'rapidfuzz' is much faster on a large glossary but scores differently from the published 'fuzzywuzzy' numbers
+PSR_BACKEND = 'fuzzywuzzy'
+PSR_WORKERS = 1    # -1 uses every core with rapidfuzz
+# Glossary CSV ('Chinese', 'English' columns). When set, each row is scored only against the few terms the
+# CSI index proposes for it instead of the whole glossary (rows it proposes nothing for still get the whole glossary).
+CSI_GLOSSARY_FILE = None
 
-def calculate_psr_for_row(reference, generated, csi_terms):
-    if not reference or not generated:
-        return 0.0
-
-    comp = csi_terms if csi_terms else [reference]
-    max_psr = 0.0
-
-    for target in comp:
-        if not target: 
-            continue
-        psr_score = fuzz.partial_ratio(str(target).lower(), str(generated).lower()) / 100.0
-
-    return max(max_psr, psr_score)
+csi_index = CSIIndex.from_csv(CSI_GLOSSARY_FILE) if CSI_GLOSSARY_FILE else None
 
 agg_scores = collections.defaultdict(lambda: {name: '' for name in FILE_NAMES})
 total = 0
@@ -41,12 +38,17 @@ for file_name in FILE_NAMES:
         file_rows = list(reader)
         total += len(file_rows)
 
-        for row in file_rows:
-            key = (row[KEY_COLUMN_INDICES[0]], row[KEY_COLUMN_INDICES[1]])
-            reference = row[COLUMN_INDEX_REFERENCE] # Column 1
-            generated = row[COLUMN_INDEX_GENERATED] # Column 4
+        # One batched call per file; CSI terms are normalized once and matched against every row together
+        references = [row[COLUMN_INDEX_REFERENCE] for row in file_rows] # Column 1
+        generated = [row[COLUMN_INDEX_GENERATED] for row in file_rows] # Column 4
+        if csi_index is not None:
+            chinese = [row[COLUMN_INDEX_CHINESE] for row in file_rows]
+            scores = csi_index.psr_scores(chinese, references, generated, backend=PSR_BACKEND, workers=PSR_WORKERS)[0]
+        else:
+            scores = psr_scores(references, generated, CSI_TERMS, backend=PSR_BACKEND, workers=PSR_WORKERS)
 
-            psr_score = calculate_psr_for_row(reference, generated, CSI_TERMS)
+        for row, psr_score in zip(file_rows, scores):
+            key = (row[KEY_COLUMN_INDICES[0]], row[KEY_COLUMN_INDICES[1]])
             agg_scores[key][file_name] = f"{psr_score:.4f}"
 
 output_header = [
@@ -1,75 +1,56 @@
 import pandas as pd
-import statsmodels.api as sm
-from statsmodels.formula.api import ols
 
-df_cs = pd.read_csv('datasets/combined_similarity_scores.csv')
-df_csi = pd.read_csv('datasets/combined_psr_scores.csv')
+from scoring.anova import two_way_anova
+from scoring.resampling import significance_long
+from scoring.results import ResultsStore
 
-def process_and_anova(df, score_col_name):
-    id_vars = df.columns[:2]
-    value_vars = df.columns[2:]
-    df_long = df.melt(id_vars=id_vars, value_vars=value_vars, var_name='Condition', value_name='Score')
+N_RESAMPLES = 10000
+RESAMPLE_WORKERS = 1    # >1 evaluates resample blocks in a process pool
+SIGNIFICANCE_OUTPUT = 'datasets/resampling_significance.csv'
 
-    def parse_condition(condition):
-        clean_name = condition.replace('.csv', '').replace('datasets/', '')
-        
-        if clean_name.lower().startswith('gpt'):
-            model = 'GPT'
-            rest = clean_name[4:]
-        elif clean_name.lower().startswith('llama'):
-            model = 'Llama'
-            rest = clean_name[6:]
-        elif clean_name.lower().startswith('gemini'):
-            model = 'Gemini'
-            rest = clean_name[7:] if clean_name.startswith('Gemini_') else clean_name.replace('Gemini', '').strip('_')
-        else:
-            model = 'Unknown'
-            rest = clean_name
-            
-        rest_lower = rest.lower().replace('_', ' ').replace('-', ' ')
-        
-        if 'culture aware' in rest_lower:
-            prompt = 'Culture-aware'
-        elif 'title and synopsis' in rest_lower:
-            prompt = 'Title & Synopsis'
-        elif 'title only' in rest_lower:
-            prompt = 'Title-only'
-        else:
-            prompt = 'Unknown'
-            
-        return pd.Series([model, prompt])
+# Model and prompt come from canonical condition names, so spelling variants of a file name map to the same level
+store = ResultsStore.concat([
+    ResultsStore.from_wide(pd.read_csv('datasets/combined_similarity_scores.csv'), metric='cosine'),
+    ResultsStore.from_wide(pd.read_csv('datasets/combined_psr_scores.csv'), metric='psr'),
+])
 
-    df_long[['Model', 'Prompt']] = df_long['Condition'].apply(parse_condition)
-    
-    df_long = df_long.dropna(subset=['Score'])
-    
-    df_long['Model'] = pd.Categorical(df_long['Model'])
-    df_long['Prompt'] = pd.Categorical(df_long['Prompt'])
-    
-    lm = ols('Score ~ C(Model) * C(Prompt)', data=df_long).fit()
-    anova_table = sm.stats.anova_lm(lm, typ=2)
+def process_and_anova(store, metric):
+    df_long = store.query(metric=metric)
+
+    # Same table as statsmodels' anova_lm(ols('score ~ C(model) * C(prompt)'), typ=2), without its import cost
+    anova_table = two_way_anova(df_long, 'score', 'model', 'prompt')
     anova_table['partial_eta_sq'] = anova_table['sum_sq'] / (anova_table['sum_sq'] + anova_table.loc['Residual', 'sum_sq'])
     
     return anova_table
 
 # Compute ANOVAs
-anova_cs = process_and_anova(df_cs, 'CS_Score')
-anova_csi = process_and_anova(df_csi, 'CSI_Score')
+anova_cs = process_and_anova(store, 'cosine')
+anova_csi = process_and_anova(store, 'psr')
 
 results = {
     'Effect': ['Model', 'Prompt Condition', 'Model × Prompt Condition'],
     'CSI-Match p-value': [
-        f"{anova_csi.loc['C(Model)', 'PR(>F)']:.2e}",
-        f"{anova_csi.loc['C(Prompt)', 'PR(>F)']:.2e}",
-        f"{anova_csi.loc['C(Model):C(Prompt)', 'PR(>F)']:.2e}"
+        f"{anova_csi.loc['C(model)', 'PR(>F)']:.2e}",
+        f"{anova_csi.loc['C(prompt)', 'PR(>F)']:.2e}",
+        f"{anova_csi.loc['C(model):C(prompt)', 'PR(>F)']:.2e}"
     ],
     'Cosine Similarity p-value': [
-        f"{anova_cs.loc['C(Model)', 'PR(>F)']:.2e}",
-        f"{anova_cs.loc['C(Prompt)', 'PR(>F)']:.2e}",
-        f"{anova_cs.loc['C(Model):C(Prompt)', 'PR(>F)']:.2e}"
+        f"{anova_cs.loc['C(model)', 'PR(>F)']:.2e}",
+        f"{anova_cs.loc['C(prompt)', 'PR(>F)']:.2e}",
+        f"{anova_cs.loc['C(model):C(prompt)', 'PR(>F)']:.2e}"
     ]
 }
 
 results_df = pd.DataFrame(results)
 print(results_df.to_string(index=False))
 
+# Paired sign-flip permutation tests and bootstrap CIs for every condition, model and prompt contrast
+metric_names = {'psr': 'CSI-Match', 'cosine': 'Cosine Similarity'}
+long_scores = store.query(metric=list(metric_names)).assign(metric=lambda d: d['metric'].map(metric_names))
+significance = significance_long(long_scores, ['title_id'], n_resamples=N_RESAMPLES, workers=RESAMPLE_WORKERS)
+significance.to_csv(SIGNIFICANCE_OUTPUT, index=False, encoding='utf-8-sig')
+
+main_effects = significance[significance['kind'] != 'condition']
+print()
+print(main_effects[['metric', 'kind', 'a', 'b', 'mean_diff', 'ci_low', 'ci_high', 'p_value']].to_string(index=False))
+print(f"\nAll {len(significance)} contrasts ({N_RESAMPLES} resamples) saved to: {SIGNIFICANCE_OUTPUT}")
@@ -0,0 +1,50 @@
+import argparse
+import importlib
+import runpy
+import sys
+
+# Subcommand -> 'module:function' or a script path, plus its help line. Nothing is imported until a command
+# is chosen, so `python cli.py --help` is instant and each step only pays for the libraries it uses.
+COMMANDS = {
+    'generate': ('generation.__main__:main', "Query the models for every prompt condition"),
+    'score': ('score_pipeline:main', "Apply metrics to the 9 condition files (long-format output)"),
+    'psr': ('calc_csi_match_psr.py', "CSI-Match PSR scores -> combined_psr_scores.csv"),
+    'cosine': ('calc_cosine_similarity:main', "Cosine similarity -> combined_similarity_scores.csv (torch)"),
+    'semantic': ('calc_BLEURT_BERTScore:main', "BLEURT and BERTScore -> combined_BLEURT_BERTScore.csv (torch)"),
+    'anova': ('calc_p_value.py', "Two-way ANOVA and resampling significance tests"),
+    'eval-cs': ('eval_cs.py', "Cosine similarity summaries"),
+    'eval-csi': ('eval_csi.py', "CSI-Match summaries"),
+    'eval-semantic': ('eval_BLEURT_BERTScore:main', "BLEURT and BERTScore summaries (torch)"),
+    'report': ('scoring.report:main', "Summary statistics for every metric"),
+    'serve': ('scoring.server:main', "Resident scoring server that keeps the metric models loaded"),
+    'check-backend': ('scoring.inference:main', "Score deltas of the int8 / ONNX backends against fp32 (torch)"),
+    'extract': ('csv_parsing_and_extract.py', "Re-parse titles and reasons from saved responses"),
+    'bench-generation': ('benchmarks.bench_generation:main', "Generation throughput against a mock server"),
+    'bench-scoring': ('benchmarks.bench_scoring:main', "Scoring stage timings on synthetic data"),
+}
+
+
+def run(command: str, args):
+    target = COMMANDS[command][0]
+    # The command sees its own arguments, so its argparse --help and errors read naturally
+    sys.argv = [f"cli.py {command}"] + list(args)
+    if target.endswith('.py'):
+        runpy.run_path(target, run_name='__main__')
+        return
+    module, function = target.split(':')
+    getattr(importlib.import_module(module), function)()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-cultural title translation evaluation toolchain.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + '\n'.join(f"  {name:<18}{help}" for name, (_, help) in COMMANDS.items()))
+    parser.add_argument('command', choices=list(COMMANDS), metavar='command')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Passed through to the command")
+    args = parser.parse_args()
+    run(args.command, args.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,21 @@
 @author: yingy
 """
 
+import os
+
 import pandas as pd
-import evaluate
-import torch
-import numpy as np
+
+from scoring.report import summarize
+from scoring.results import ResultsStore, canonical_condition
+from scoring.semantic import SemanticScorer
+from scoring.server import ScoringClient
 
 
-# Path to the CSV file (should iterate over each of the nine files)
-INPUT_CSV = r"Llama_Title-only.csv"
+# Paths to the CSV files; the metric models are loaded once for all of them
+INPUT_CSVS = [r"Llama_Title-only.csv"]
 
-# Output CSV with metric scores
-OUTPUT_CSV = r"Llama_Title-only_metrics_scored.csv"
+# Output CSV with metric scores (one per input file)
+OUTPUT_SUFFIX = "_metrics_scored.csv"
 
 # Column indices
 REF_COL_IDX = 0    # 1st column: reference
@@ -25,62 +29,74 @@ BERTSCORE_MODEL = None
 # BLEURT settings
 BLEURT_CHECKPOINT = "bleurt-20"
 
+# Scoring settings
+BATCH_SIZE = 64
+NUM_THREADS = None
+INFERENCE_BACKEND = "fp32"   # "int8" for quantized CPU scoring; check agreement with `python cli.py check-backend`
+SCORING_SERVER = None   # e.g. '127.0.0.1:8765' to score on a running `python cli.py serve` with warm models
+
 def main():
     
-    df = pd.read_csv(INPUT_CSV)
-
-    # Extract reference and prediction columns
-    references = df.iloc[:, REF_COL_IDX].astype(str).fillna("").str.strip().tolist()
-    predictions = df.iloc[:, PRED_COL_IDX].astype(str).fillna("").str.strip().tolist()
-
-    print(f"Loaded {len(predictions)} samples.")
-
-    # ---- Device ----
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"Using device: {device}")
-
-    # ---- BLEURT ----
-    bleurt = evaluate.load("bleurt", checkpoint=BLEURT_CHECKPOINT)
-    bleurt_result = bleurt.compute(
-        predictions=predictions,
-        references=references 
-    )
-    bleurt_scores = bleurt_result["scores"]
-    bleurt_arr = np.array(bleurt_scores)
-
-    # ---- BERTScore ----
-    bertscore = evaluate.load("bertscore")
-    bert_kwargs = dict(
-        predictions=predictions,
-        references=references,
-        lang=BERTSCORE_LANG,
-        device=device 
-    )
-    if BERTSCORE_MODEL is not None:
-        bert_kwargs["model_type"] = BERTSCORE_MODEL
-    bert_result = bertscore.compute(**bert_kwargs)
-    bert_p = np.array(bert_result["precision"])
-    bert_r = np.array(bert_result["recall"])
-    bert_f1 = np.array(bert_result["f1"])
-    
-    # ---- Save per-example scores ----
-    df["reference_used"] = references
-    df["prediction_used"] = predictions
-    df["BLEURT"] = bleurt_arr
-    df["BERTScore_P"] = bert_p
-    df["BERTScore_R"] = bert_r
-    df["BERTScore_F1"] = bert_f1
+    frames = {}
+    conditions = {}
+    for input_csv in INPUT_CSVS:
+        df = pd.read_csv(input_csv)
+
+        # Extract reference and prediction columns
+        references = df.iloc[:, REF_COL_IDX].astype(str).fillna("").str.strip().tolist()
+        predictions = df.iloc[:, PRED_COL_IDX].astype(str).fillna("").str.strip().tolist()
+
+        print(f"Loaded {len(predictions)} samples from {input_csv}.")
+        frames[input_csv] = df
+        conditions[input_csv] = (references, predictions)
+
+    # ---- BLEURT + BERTScore (models loaded once, all files scored together; a running server skips the load) ----
+    scorer = ScoringClient.connect(SCORING_SERVER, bleurt_checkpoint=BLEURT_CHECKPOINT, bertscore_model=BERTSCORE_MODEL,
+                                   semantic_batch_size=BATCH_SIZE, num_threads=NUM_THREADS,
+                                   inference_backend=INFERENCE_BACKEND) \
+        or SemanticScorer(BLEURT_CHECKPOINT, BERTSCORE_MODEL, BERTSCORE_LANG,
+                          batch_size=BATCH_SIZE, num_threads=NUM_THREADS, backend=INFERENCE_BACKEND)
+    scores = scorer.score_conditions(conditions)
+
+    long_frames = []
+    for input_csv, df in frames.items():
+        references, predictions = conditions[input_csv]
+        bleurt_arr = scores[input_csv]["BLEURT"]
+        bert_p = scores[input_csv]["BERTScore_P"]
+        bert_r = scores[input_csv]["BERTScore_R"]
+        bert_f1 = scores[input_csv]["BERTScore_F1"]
+        output_csv = input_csv.replace(".csv", "") + OUTPUT_SUFFIX
+
+        # ---- Save per-example scores ----
+        df["reference_used"] = references
+        df["prediction_used"] = predictions
+        df["BLEURT"] = bleurt_arr
+        df["BERTScore_P"] = bert_p
+        df["BERTScore_R"] = bert_r
+        df["BERTScore_F1"] = bert_f1
     
-    df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
+        df.to_csv(output_csv, index=False, encoding="utf-8-sig")
     
-    # ---- Print summary (mean ± std) ----
-    print("\n=== Evaluation Summary (mean ± std) ===")
-    print(f"BLEURT:        {bleurt_arr.mean():.4f} ± {bleurt_arr.std(ddof=1):.4f}")
-    print(f"BERTScore P:   {bert_p.mean():.4f} ± {bert_p.std(ddof=1):.4f}")
-    print(f"BERTScore R:   {bert_r.mean():.4f} ± {bert_r.std(ddof=1):.4f}")
-    print(f"BERTScore F1:  {bert_f1.mean():.4f} ± {bert_f1.std(ddof=1):.4f}")
-
-    print(f"\nSaved results to: {OUTPUT_CSV}")
+        print(f"Saved results to: {output_csv}")
+
+        try:
+            model, prompt = canonical_condition(input_csv)
+        except ValueError:
+            # Any file can be scored; one not named after a model and prompt is summarized under its own name
+            model, prompt = os.path.basename(input_csv).replace(".csv", ""), ""
+            print(f"Warning: {input_csv} does not name a model and prompt; summarizing it as '{model}'")
+        titles = df.iloc[:, :2].astype(str)
+        for metric, values in (("bleurt", bleurt_arr), ("bertscore_p", bert_p), ("bertscore_r", bert_r), ("bertscore_f1", bert_f1)):
+            long_frames.append(pd.DataFrame({
+                "title_id": titles.groupby(list(titles.columns), sort=False).ngroup(),
+                "english_title": titles.iloc[:, 0], "chinese_title": titles.iloc[:, 1],
+                "model": model, "prompt": prompt, "metric": metric, "score": values,
+            }))
+
+    # ---- Print summary for every file and metric in one table ----
+    summary = summarize(ResultsStore(pd.concat(long_frames, ignore_index=True)))
+    print("\n=== Evaluation Summary ===")
+    print(summary[["metric", "model", "prompt", "n", "mean", "std", "ci_low", "ci_high"]].round(4).to_string(index=False))
 
 if __name__ == "__main__":
     main()
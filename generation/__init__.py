@@ -0,0 +1,6 @@
+from .cache import ResponseCache
+from .dispatch import build_jobs, collect_results, dispatch_jobs, process_data
+from .journal import RunJournal
+from .parsing import PARSED_FIELDNAMES, is_error, parse_response
+from .prompts import OUTPUT_FIELDNAMES, PROMPTS, load_rows, write_csv
+from .providers import PROVIDERS, AzureProvider, GeminiProvider, OpenAICompatibleProvider, Provider
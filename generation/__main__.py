@@ -0,0 +1,79 @@
+import argparse
+import os
+from typing import List
+
+import tracing
+
+from . import batch, runner
+from .prompts import PROMPTS, load_rows
+from .providers import AzureProvider, GeminiProvider, OpenAICompatibleProvider, Provider
+
+INPUT_FILE = 'datasets/Final dataset(Sheet1).csv'
+
+# Models from the paper; keys and the Azure endpoint come from the environment
+AZURE_DEPLOYMENT_NAME = 'gpt-5-chat'
+GEMINI_MODEL = 'gemini-2.5-flash-preview-09-2025'
+GROQ_MODEL = 'llama-3.1-8b-instant'
+
+
+def build_providers(names: List[str], max_in_flight: int) -> List[Provider]:
+    providers = []
+    for name in names:
+        if name == 'azure':
+            providers.append(AzureProvider(
+                AZURE_DEPLOYMENT_NAME, os.environ.get('AZURE_OPENAI_API_KEY', ''),
+                endpoint=os.environ.get('AZURE_OPENAI_ENDPOINT', ''),
+                requests_per_minute=300, tokens_per_minute=50000, max_in_flight=max_in_flight
+            ))
+        elif name == 'gemini':
+            providers.append(GeminiProvider(
+                GEMINI_MODEL, os.environ.get('GEMINI_API_KEY', ''),
+                requests_per_minute=10, tokens_per_minute=250000, max_in_flight=max_in_flight
+            ))
+        elif name == 'groq':
+            providers.append(OpenAICompatibleProvider(
+                GROQ_MODEL, os.environ.get('GROQ_API_KEY', ''),
+                requests_per_minute=30, tokens_per_minute=6000, max_in_flight=max_in_flight
+            ))
+    return providers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every model x prompt condition in one process.")
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--output-dir', default='outputs')
+    parser.add_argument('--providers', nargs='+', choices=['azure', 'gemini', 'groq'], default=['azure', 'gemini', 'groq'])
+    parser.add_argument('--max-in-flight', type=int, default=8, help="Concurrent requests per provider")
+    parser.add_argument('--cache-file', default='llm_response_cache.sqlite', help="Pass '' to disable the cache")
+    parser.add_argument('--checkpoint-every', type=int, default=10)
+    parser.add_argument('--batch', action='store_true', help="Submit through the provider Batch API (azure, groq)")
+    parser.add_argument('--structured', action='store_true',
+                        help="Ask for JSON output on the Culture-aware prompt (changes the prompt text)")
+    parser.add_argument('--poll-interval', type=float, default=60, help="Seconds between batch status checks")
+    parser.add_argument('--trace', default=None, metavar='DIR',
+                        help="Write trace.json, a Chrome trace and Prometheus metrics for this run to DIR")
+    parser.add_argument('--metrics-port', type=int, default=None, help="Serve Prometheus metrics at :PORT/metrics")
+    args = parser.parse_args()
+    tracing.configure(args.trace, args.metrics_port)
+
+    providers = build_providers(args.providers, args.max_in_flight)
+    for provider in [p for p in providers if not p.configured()]:
+        print(f"Skipping {provider.name}: no API key or endpoint configured.")
+    providers = [p for p in providers if p.configured()]
+    data_rows = load_rows(args.input)
+    if args.batch:
+        for provider in [p for p in providers if p.supports_batch()]:
+            batch.run_batch(provider, data_rows, PROMPTS, args.output_dir,
+                            cache_file=args.cache_file or None, poll_interval=args.poll_interval,
+                            structured=args.structured)
+        providers = [p for p in providers if not p.supports_batch()]
+        if providers:
+            print(f"No batch endpoint for {', '.join(p.name for p in providers)}; running synchronously.")
+    if providers:
+        runner.run(providers, data_rows, PROMPTS, args.output_dir,
+                   cache_file=args.cache_file or None, checkpoint_every=args.checkpoint_every,
+                   structured=args.structured)
+
+
+if __name__ == "__main__":
+    main()
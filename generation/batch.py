@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from tracing import span
+
+from .cache import ResponseCache
+from .dispatch import MISSING_OVERVIEW, build_jobs, collect_results
+from .parsing import is_error
+from .providers import Provider, shared_session
+from .runner import write_outputs
+
+TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+
+def custom_id(job: Dict[str, Any]) -> str:
+    return f"prompt{job['p_num']}-row{job['row_index']}"
+
+
+def compile_batch(provider: Provider, jobs: List[Dict[str, Any]], path: str) -> int:
+    # One JSONL request line per (title, prompt); jobs without a query never leave the machine
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for job in jobs:
+            if job['user_query'] is None:
+                continue
+            line = {
+                "custom_id": custom_id(job),
+                "method": "POST",
+                "url": provider.batch_endpoint,
+                "body": provider.batch_body(job['user_query'], job['structured'])
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _auth_headers(provider: Provider) -> Dict[str, str]:
+    return {k: v for k, v in provider.headers().items() if k != 'Content-Type'}
+
+
+def submit_batch(provider: Provider, path: str) -> str:
+    session = shared_session()
+    with open(path, 'rb') as f, span('batch.upload', 'http', provider=provider.name):
+        response = session.post(provider.api_url('files'), headers=_auth_headers(provider),
+                                files={'file': (os.path.basename(path), f, 'application/jsonl')},
+                                data={'purpose': 'batch'})
+    response.raise_for_status()
+    file_id = response.json()['id']
+
+    response = session.post(provider.api_url('batches'), headers=provider.headers(), json={
+        "input_file_id": file_id,
+        "endpoint": provider.batch_endpoint,
+        "completion_window": "24h"
+    })
+    response.raise_for_status()
+    return response.json()['id']
+
+
+def wait_for_batch(provider: Provider, batch_id: str, poll_interval: float = 30) -> Dict[str, Any]:
+    session = shared_session()
+    while True:
+        with span('batch.poll', 'http', provider=provider.name):
+            response = session.get(provider.api_url(f'batches/{batch_id}'), headers=provider.headers())
+        response.raise_for_status()
+        batch = response.json()
+        counts = batch.get('request_counts') or {}
+        print(f"{provider.name}: batch {batch_id} {batch['status']} "
+              f"({counts.get('completed', 0)}/{counts.get('total', '?')} done, {counts.get('failed', 0)} failed)")
+        if batch['status'] in TERMINAL_STATUSES:
+            return batch
+        with span('batch.wait', 'rate_limit', provider=provider.name):
+            time.sleep(poll_interval)
+
+
+def download_results(provider: Provider, batch: Dict[str, Any]) -> Dict[str, str]:
+    session = shared_session()
+    responses = {}
+    for key in ('output_file_id', 'error_file_id'):
+        if not batch.get(key):
+            continue
+        with span('batch.download', 'http', provider=provider.name):
+            response = session.get(provider.api_url(f"files/{batch[key]}/content"), headers=provider.headers())
+        response.raise_for_status()
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            body = (entry.get('response') or {}).get('body') or {}
+            text = provider.extract_text(body) if (entry.get('response') or {}).get('status_code') == 200 else None
+            if text:
+                responses[entry['custom_id']] = text.strip()
+            else:
+                error = entry.get('error') or body.get('error') or 'no content'
+                responses[entry['custom_id']] = f"ERROR: Batch request failed: {json.dumps(error, ensure_ascii=False)}"
+    return responses
+
+
+def run_batch(provider: Provider, data_rows: List[Dict[str, str]], prompts: Dict[int, Dict[str, Any]],
+              output_dir: str = '.', cache_file: Optional[str] = 'llm_response_cache.sqlite',
+              poll_interval: float = 30, structured: bool = False) -> Dict[int, List[Dict[str, str]]]:
+    if not provider.supports_batch():
+        raise ValueError(f"{provider.name} has no OpenAI-style batch endpoint; use the synchronous runner instead")
+
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = build_jobs(data_rows, prompts, structured)
+    input_path = os.path.join(output_dir, f"{provider.output_prefix}_batch_input.jsonl")
+    state_path = os.path.join(output_dir, f"{provider.output_prefix}_batch_state.json")
+
+    # Queries already answered by an earlier synchronous or batch run are read back instead of uploaded again
+    cache = ResponseCache(cache_file) if cache_file else None
+    cached = {}
+    if cache is not None:
+        for index, job in enumerate(jobs):
+            if job['user_query'] is not None:
+                text = cache.get(ResponseCache.make_key(provider.name, provider.model, job['template'], job['user_query']))
+                if text is not None:
+                    cached[index] = text
+    pending = [job for index, job in enumerate(jobs) if index not in cached]
+
+    # A batch that was already submitted for the same requests is polled again instead of being paid for twice;
+    # if the input sheet, prompts or --structured changed since, its results would not match the jobs
+    count = compile_batch(provider, pending, input_path)
+    by_id, status = {}, 'completed'
+    if count:
+        input_hash = file_hash(input_path)
+        state = None
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('input_sha256') != input_hash:
+                print(f"{provider.name}: batch {state['batch_id']} was built from different requests; resubmitting")
+                state = None
+        if state is not None:
+            batch_id = state['batch_id']
+            print(f"{provider.name}: resuming batch {batch_id}")
+        else:
+            batch_id = submit_batch(provider, input_path)
+            with open(state_path, 'w', encoding='utf-8') as f:
+                json.dump({'batch_id': batch_id, 'input_file': input_path, 'input_sha256': input_hash,
+                           'requests': count}, f)
+            print(f"{provider.name}: submitted batch {batch_id} with {count} requests ({len(cached)} cached)")
+
+        batch = wait_for_batch(provider, batch_id, poll_interval)
+        by_id, status = download_results(provider, batch), batch['status']
+    else:
+        print(f"{provider.name}: all {len(cached)} requests cached; nothing to submit")
+
+    responses = []
+    for index, job in enumerate(jobs):
+        if job['user_query'] is None:
+            responses.append(MISSING_OVERVIEW)
+        elif index in cached:
+            responses.append(cached[index])
+        else:
+            responses.append(by_id.get(custom_id(job), f"ERROR: Batch {status} without a result"))
+
+    # Seed the response cache so later synchronous runs reuse the batch output
+    if cache is not None:
+        for index, (job, response_text) in enumerate(zip(jobs, responses)):
+            if job['user_query'] is not None and index not in cached and not is_error(response_text):
+                key = ResponseCache.make_key(provider.name, provider.model, job['template'], job['user_query'])
+                cache.put(key, response_text, provider.name, provider.model, job['template'])
+        cache.close()
+
+    results = collect_results(jobs, responses, prompts)
+    write_outputs(provider, results, prompts, output_dir)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return results
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+def template_hash(template: str) -> str:
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:16]
+
+
+class ResponseCache:
+    # On-disk cache of successful responses, keyed by (provider, model, prompt template, rendered query)
+    def __init__(self, path: str, max_entries: int = 100000, max_age_days: Optional[float] = 90):
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " provider TEXT, model TEXT, template_hash TEXT,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(provider: str, model: str, template: str, user_query: str) -> str:
+        raw = json.dumps([provider, model, template_hash(template), user_query], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+        return row[0]
+
+    def put(self, key: str, response: str, provider: str = '', model: str = '', template: str = ''):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, template_hash(template), response, now, now)
+            )
+            self.conn.commit()
+
+    def evict(self):
+        with self.lock:
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                self.conn.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,))
+            # Least recently used entries go first once the cache is over size
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
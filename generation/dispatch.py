@@ -0,0 +1,129 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .cache import ResponseCache
+from .journal import RunJournal
+from .parsing import STRUCTURED_INSTRUCTION, is_error, parse_response
+
+MISSING_OVERVIEW = "ERROR: Skipping query for missing Overview data."
+
+
+def build_jobs(data_rows: List[Dict[str, str]], prompts: Dict[int, Dict[str, Any]],
+               structured: bool = False) -> List[Dict[str, Any]]:
+    # One job per (title, prompt), in the same order the serial loop used to visit them.
+    # In structured mode, prompts marked 'structured' ask for JSON and request the provider's JSON output mode.
+    jobs = []
+    for i, row in enumerate(data_rows):
+        chinese_title = row.get('Chinese Title', '').strip()
+        overview = row.get('Overview', '').strip()
+
+        if not chinese_title:
+            continue
+
+        template_data = {
+            "chinese_title": chinese_title,
+            "overview": overview
+        }
+
+        for p_num, p_config in prompts.items():
+            is_structured = structured and p_config.get('structured', False)
+            template = p_config['user_query_template'] + (STRUCTURED_INSTRUCTION if is_structured else '')
+            if "overview" in p_config["data_columns"] and not overview:
+                user_query = None
+            else:
+                user_query = template.format(**template_data)
+
+            jobs.append({
+                'row_index': i,
+                'p_num': p_num,
+                'user_query': user_query,
+                'template': template,
+                'structured': is_structured,
+                'result_row': {
+                    'English Title': row.get('English Title', ''),
+                    'Chinese Title': chinese_title,
+                    'Overview': overview,
+                    'Prompt_Response': ''
+                }
+            })
+    return jobs
+
+
+async def dispatch_jobs(jobs: List[Dict[str, Any]], call_api: Callable[[str], str], max_in_flight: int = 8,
+                        cache: Optional[ResponseCache] = None, provider: str = '', model: str = '',
+                        journal: Optional[RunJournal] = None,
+                        checkpoint: Optional[Callable[[List[Optional[str]]], None]] = None,
+                        checkpoint_every: int = 10) -> List[str]:
+    # call_api is a blocking function (requests.post); each in-flight request gets its own worker thread
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_in_flight)
+    responses: List[Optional[str]] = [None] * len(jobs)
+    done = 0
+
+    async def run(index, job):
+        nonlocal done
+        journaled = journal.get(job) if journal is not None else None
+        if job['user_query'] is None:
+            response_text, status = MISSING_OVERVIEW, "skipped"
+        elif journaled is not None:
+            response_text, status = journaled, "resumed"
+        else:
+            cached = None
+            if cache is not None:
+                key = ResponseCache.make_key(provider, model, job['template'], job['user_query'])
+                cached = cache.get(key)
+            if cached is not None:
+                response_text, status = cached, "cached"
+            else:
+                async with semaphore:
+                    call = functools.partial(call_api, job['user_query'], structured=True) if job['structured'] \
+                        else functools.partial(call_api, job['user_query'])
+                    response_text = await loop.run_in_executor(executor, call)
+                status = "ERROR" if is_error(response_text) else "ok"
+                # Only successful responses are cached so failures are retried on the next run
+                if cache is not None and status == "ok":
+                    cache.put(key, response_text, provider, model, job['template'])
+            if journal is not None and not is_error(response_text):
+                journal.record(job, response_text)
+
+        responses[index] = response_text
+        done += 1
+        print(f"[{provider} {done}/{len(jobs)}] Prompt {job['p_num']}: '{job['result_row']['Chinese Title']}' {status}")
+        if checkpoint is not None and done % checkpoint_every == 0 and done < len(jobs):
+            checkpoint(responses)
+        return response_text
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        return await asyncio.gather(*(run(index, job) for index, job in enumerate(jobs)))
+
+
+def collect_results(jobs: List[Dict[str, Any]], responses: List[Optional[str]],
+                    prompts: Dict[int, Dict[str, Any]]) -> Dict[int, List[Dict[str, str]]]:
+    # Rows follow job order, so output matches the input sheet regardless of completion order;
+    # jobs that have not finished yet (None) are left out of partial checkpoints
+    all_results = {p_num: [] for p_num in prompts}
+    for job, response_text in zip(jobs, responses):
+        if response_text is None:
+            continue
+        # Parsed here, as responses come in, so the output CSVs need no separate extraction pass
+        result_row = dict(job['result_row'], Prompt_Response=response_text, **parse_response(response_text))
+        all_results[job['p_num']].append(result_row)
+    return all_results
+
+
+def process_data(data_rows: List[Dict[str, str]], prompts: Dict[int, Dict[str, Any]],
+                 call_api: Callable[[str], str], max_in_flight: int = 8,
+                 cache: Optional[ResponseCache] = None, provider: str = '', model: str = '',
+                 journal: Optional[RunJournal] = None,
+                 checkpoint: Optional[Callable[[Dict[int, List[Dict[str, str]]]], None]] = None,
+                 checkpoint_every: int = 10) -> Dict[int, List[Dict[str, str]]]:
+    jobs = build_jobs(data_rows, prompts)
+    on_checkpoint = None
+    if checkpoint is not None:
+        on_checkpoint = lambda responses: checkpoint(collect_results(jobs, responses, prompts))
+
+    responses = asyncio.run(dispatch_jobs(jobs, call_api, max_in_flight, cache, provider, model,
+                                          journal, on_checkpoint, checkpoint_every))
+    return collect_results(jobs, responses, prompts)
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from .cache import template_hash
+
+
+class RunJournal:
+    # Append-only JSONL log of completed (title, prompt) responses, so a crashed run can resume.
+    # Removed once the run's outputs are written, so it never replays into a later run.
+    def __init__(self, path: str):
+        self.path = path
+        self.completed = self._load()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def job_key(job: Dict[str, Any]) -> str:
+        # Keyed on content, not position, so a reordered input sheet still resumes; the template and query hashes
+        # guard against an edited prompt, a changed overview or a structured-mode run, like ResponseCache.make_key
+        query_hash = hashlib.sha256((job['user_query'] or '').encode('utf-8')).hexdigest()[:16]
+        return f"{job['p_num']}:{job['result_row']['Chinese Title']}:{template_hash(job['template'])}:{query_hash}"
+
+    def _load(self) -> Dict[str, str]:
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if data and not data.endswith(b'\n'):
+            # A crash mid-write leaves at most one truncated line at the end; cut it off so the next
+            # record starts on a line of its own instead of being glued to (and lost with) the fragment
+            data = data[:data.rfind(b'\n') + 1]
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(data))
+        for line in data.decode('utf-8').splitlines():
+            entry = json.loads(line)
+            completed[entry['key']] = entry['response']
+        return completed
+
+    def get(self, job: Dict[str, Any]) -> Optional[str]:
+        return self.completed.get(self.job_key(job))
+
+    def record(self, job: Dict[str, Any], response_text: str):
+        key = self.job_key(job)
+        self.completed[key] = response_text
+        self.file.write(json.dumps({'key': key, 'response': response_text}, ensure_ascii=False) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
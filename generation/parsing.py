@@ -0,0 +1,74 @@
+import json
+import re
+from typing import Dict, Optional
+
+PARSED_FIELDNAMES = ['Extracted_English_Title', 'Translation_Reason']
+
+# Appended to structured prompt templates (hence the doubled braces); OpenAI-style JSON mode also requires
+# the word JSON somewhere in the prompt
+STRUCTURED_INSTRUCTION = '\n请只输出一个JSON对象，格式为：{{"英文片名": "<英文片名>", "理由": "<翻译理由>"}}'
+
+TITLE_KEYS = ('英文片名', '英文译名', '英文标题', 'english_title', 'English Title', 'title')
+REASON_KEYS = ('理由', '翻译理由', 'reason', 'translation_reason', 'Reason')
+
+TITLE_LABEL = r"(?:英文片名|英文译名|英文标题|English Title)"
+REASON_LABEL = r"(?:翻译理由|理由|Reason|Rationale)"
+# Labels are often wrapped in markdown ("**英文片名：** ...") or followed by a full-width colon
+TITLE_RE = re.compile(rf"{TITLE_LABEL}[*_]*\s*[:：][*_\s]*(.+?)\s*(?=\n|{REASON_LABEL}[*_]*\s*[:：]|$)", re.IGNORECASE)
+REASON_RE = re.compile(rf"{REASON_LABEL}[*_]*\s*[:：][*_\s]*(.*)", re.IGNORECASE | re.DOTALL)
+FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def is_error(response_text: str) -> bool:
+    # Every failure the pipeline records starts with this prefix; a model answer merely mentioning "ERROR" is not one
+    return response_text.startswith("ERROR:")
+
+
+def clean_title(title: str) -> str:
+    return title.strip().strip('*_`"“”\'‘’《》「」 ').strip()
+
+
+def _flatten(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def parse_json(response_text: str) -> Optional[Dict[str, str]]:
+    fenced = FENCE_RE.search(response_text)
+    candidate = fenced.group(1) if fenced else response_text
+    start, end = candidate.find('{'), candidate.rfind('}')
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(candidate[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    title = next((data[k] for k in TITLE_KEYS if isinstance(data.get(k), str)), None)
+    if title is None:
+        return None
+    reason = next((data[k] for k in REASON_KEYS if isinstance(data.get(k), str)), '')
+    return {"Extracted_English_Title": clean_title(title), "Translation_Reason": _flatten(reason)}
+
+
+def parse_response(response_text: str) -> Dict[str, str]:
+    # JSON (structured mode) first, then the labelled prompt-3 layout, then a bare title on the first line
+    if not response_text or not response_text.strip() or is_error(response_text):
+        return {"Extracted_English_Title": "N/A", "Translation_Reason": response_text}
+
+    parsed = parse_json(response_text)
+    if parsed is not None:
+        return parsed
+
+    title_match = TITLE_RE.search(response_text)
+    reason_match = REASON_RE.search(response_text)
+    if title_match:
+        return {
+            "Extracted_English_Title": clean_title(title_match.group(1)),
+            "Translation_Reason": _flatten(reason_match.group(1)) if reason_match else ""
+        }
+
+    lines = [line for line in response_text.strip().splitlines() if line.strip()]
+    reason = _flatten(reason_match.group(1)) if reason_match else _flatten(' '.join(lines[1:]))
+    return {"Extracted_English_Title": clean_title(lines[0]), "Translation_Reason": reason}
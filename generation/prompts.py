@@ -0,0 +1,64 @@
+import csv
+import os
+from typing import Dict, List
+
+from tracing import span, traced
+
+from .parsing import PARSED_FIELDNAMES
+
+PROMPTS = {
+    1: {
+        "title": "Title-only",
+        "data_columns": ["chinese_title"],
+        "user_query_template": (
+            "请直接根据所给的中文电影片名翻译为英文。不要查找或使用该电影的任何外部信息，包括简介、评论或官方英文译名。只输出一个英文片名，不要添加解释、说明或其他内容。"
+            "中文片名：{chinese_title}"
+        )
+    },
+    2: {
+        "title": "Title_and_Synopsis",
+        "data_columns": ["chinese_title", "overview"],
+        "user_query_template": (
+            "请根据提供的剧情简介将以下中文电影标题翻译成英文。请不要查找或使用关于该电影的任何外部信息，包括官方网站、新闻文章或观众评论。仅输出一个英文标题。不要添加任何解释、描述或额外文本。"
+            "中文片名：{chinese_title}\n"
+            "概述：{overview}"
+        )
+    },
+    3: {
+        "title": "Culture-aware",
+        "data_columns": ["chinese_title", "overview"],
+        "structured": True,    # Asks for JSON output when a run enables structured mode
+        "user_query_template": (
+            "请将以下中文电影片名翻译为英文。不要查找或使用该电影的官方英文译名。请避免逐字直译，应结合语义、语气与文化背景，尽量保留或恰当地转化原片名中蕴含的中国文化元素，使译名在英文语境中既自然流畅，又能体现原片名的文化意涵。译完后，请简要说明你的翻译理由（不超过两句话）。"
+            "中文片名：{chinese_title}\n"
+            "概述：{overview}"
+        )
+    }
+}
+
+# Parsed columns come last so the positional columns the scoring scripts read do not move
+OUTPUT_FIELDNAMES = ['English Title', 'Chinese Title', 'Overview', 'Prompt_Response'] + PARSED_FIELDNAMES
+
+
+@traced('csv.read', 'io')
+def load_rows(path: str) -> List[Dict[str, str]]:
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip().replace('\ufeff', '') for name in reader.fieldnames]
+        return list(reader)
+
+
+def write_csv(fn: str, fieldnames: List[str], data: List[Dict[str, str]]) -> str:
+    try:
+        with span('csv.write', 'io', path=fn, rows=len(data)), \
+                open(fn + '.tmp', 'w', newline='', encoding='utf-8-sig') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(data)
+        # Checkpoints rewrite the file mid-run, so swap it in atomically
+        os.replace(fn + '.tmp', fn)
+        return fn
+    except Exception as e:
+        print(f"ERROR writing to CSV {fn}: {e}")
+        return ""
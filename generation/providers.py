@@ -0,0 +1,272 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+    import h2  # noqa: F401  httpx only negotiates HTTP/2 when h2 is installed
+except ImportError:
+    httpx = None
+
+from tracing import count, span
+
+from .rate_limit import RateLimiter, estimate_tokens
+
+POOL_SIZE = 64    # Keep-alive connections per host, shared by every provider in the process
+REQUEST_TIMEOUT = 120
+
+TRANSPORT_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def shared_session():
+    # One pooled client per process so TLS handshakes are paid once per host, not once per request
+    global _session
+    with _session_lock:
+        if _session is None:
+            if httpx is not None:
+                limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+                _session = httpx.Client(http2=True, limits=limits, timeout=REQUEST_TIMEOUT)
+            else:
+                _session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE)
+                _session.mount('https://', adapter)
+                _session.mount('http://', adapter)
+        return _session
+
+
+class Provider(ABC):
+    name = ''
+
+    def __init__(self, model: str, api_key: str, requests_per_minute: float = 60,
+                 tokens_per_minute: Optional[float] = None, max_in_flight: int = 8,
+                 base_url: Optional[str] = None):
+        self.model = model
+        self.api_key = api_key
+        self.max_in_flight = max_in_flight
+        self.base_url = base_url
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    @property
+    def output_prefix(self) -> str:
+        return f"{self.name}_{self.model.replace('-', '_')}"
+
+    def configured(self) -> bool:
+        return bool(self.api_key) and "YOUR_SECRET" not in self.api_key
+
+    @abstractmethod
+    def url(self) -> str:
+        pass
+
+    @abstractmethod
+    def headers(self) -> Dict[str, str]:
+        pass
+
+    @abstractmethod
+    def payload(self, user_query: str, structured: bool = False) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def extract_text(self, result: Dict[str, Any]) -> Optional[str]:
+        pass
+
+    def total_tokens(self, result: Dict[str, Any]) -> int:
+        return 0
+
+    def is_rate_limited(self, response) -> bool:
+        return response.status_code == 429
+
+    def supports_batch(self) -> bool:
+        return False
+
+    def call(self, user_query: str, max_retries: int = 10, structured: bool = False) -> str:
+        if not self.configured():
+            return f"ERROR: Please update your {self.name} configuration!"
+
+        estimated_tokens = estimate_tokens(user_query)
+        session = shared_session()
+
+        for attempt in range(max_retries):
+            self.limiter.acquire(estimated_tokens)
+            try:
+                with span('http.request', 'http', provider=self.name, attempt=attempt) as attrs:
+                    response = session.post(self.url(), headers=self.headers(), json=self.payload(user_query, structured))
+                    attrs['status'] = response.status_code
+                count('http_requests', provider=self.name, status=response.status_code)
+
+                if self.is_rate_limited(response):
+                    if attempt < max_retries - 1:
+                        count('retries', provider=self.name, reason='rate_limit')
+                        wait_time = self.limiter.throttle(response, attempt)
+                        print(f"{self.name}: Rate Limit. Retrying in {wait_time:.1f}s...")
+                        continue
+                    print(f"{self.name}: Failed after {max_retries} attempts.")
+                    return "ERROR: Failed after multiple retries due to rate limit (429)."
+
+                if response.status_code in (400, 401, 403):
+                    print(f"{self.name}: Check your API Key, model name or quota settings. Response: {response.text}")
+                    return f"ERROR: Authentication/Request Failed ({response.status_code})."
+
+                if response.status_code == 200:
+                    result = response.json()
+                    self.limiter.record_usage(estimated_tokens, self.total_tokens(result))
+                    text = self.extract_text(result)
+                    if text:
+                        return text.strip()
+                    print(f"{self.name}: API returned no text content: {json.dumps(result, ensure_ascii=False)}")
+                    return "ERROR: API returned empty or unexpected response."
+
+                # 5xx and other transient statuses fall through to a backoff retry
+                print(f"{self.name}: HTTP Error {response.status_code} on attempt {attempt + 1}: {response.text}")
+                reason = 'http_error'
+
+            except TRANSPORT_ERRORS as e:
+                print(f"{self.name}: Request Error on attempt {attempt + 1}: {e}")
+                reason = 'transport'
+            except ValueError as e:
+                print(f"{self.name}: JSON Decode Error on attempt {attempt + 1}: {e}")
+                reason = 'decode'
+
+            if attempt < max_retries - 1:
+                count('retries', provider=self.name, reason=reason)
+                with span('backoff.sleep', 'rate_limit', provider=self.name, attempt=attempt):
+                    time.sleep(self.limiter.backoff(attempt))
+
+        return "ERROR: Failed to get response after multiple retries."
+
+
+class OpenAICompatibleProvider(Provider):
+    # Groq and any other server speaking the OpenAI chat-completions wire format
+    name = 'groq'
+    default_base_url = 'https://api.groq.com/openai/v1'
+
+    def url(self) -> str:
+        return f"{(self.base_url or self.default_base_url).rstrip('/')}/chat/completions"
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        }
+
+    def payload(self, user_query: str, structured: bool = False) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": user_query}
+            ],
+            "temperature": 0.0,
+        }
+        if structured:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+
+    def extract_text(self, result: Dict[str, Any]) -> Optional[str]:
+        if result.get('choices') and result['choices'][0].get('message'):
+            return result['choices'][0]['message'].get('content')
+        return None
+
+    def total_tokens(self, result: Dict[str, Any]) -> int:
+        return result.get('usage', {}).get('total_tokens', 0)
+
+    # OpenAI-style Batch API: upload a JSONL file, create a batch, poll, download the output file
+    batch_endpoint = '/v1/chat/completions'
+
+    def supports_batch(self) -> bool:
+        return True
+
+    def api_url(self, path: str) -> str:
+        return f"{(self.base_url or self.default_base_url).rstrip('/')}/{path}"
+
+    def batch_body(self, user_query: str, structured: bool = False) -> Dict[str, Any]:
+        return self.payload(user_query, structured)
+
+
+class AzureProvider(OpenAICompatibleProvider):
+    name = 'azure'
+    batch_endpoint = '/chat/completions'
+    batch_api_version = '2024-10-21'    # Batch needs a newer API version and a Global-Batch deployment
+
+    def __init__(self, model: str, api_key: str, endpoint: str, api_version: str = '2024-02-01', **kwargs):
+        # On Azure the model is the deployment name
+        super().__init__(model, api_key, base_url=kwargs.pop('base_url', endpoint), **kwargs)
+        self.api_version = api_version
+
+    def configured(self) -> bool:
+        return super().configured() and "[YOUR-" not in (self.base_url or '')
+
+    def url(self) -> str:
+        return f"{self.base_url.rstrip('/')}/openai/deployments/{self.model}/chat/completions?api-version={self.api_version}"
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            'Content-Type': 'application/json',
+            'api-key': self.api_key
+        }
+
+    def payload(self, user_query: str, structured: bool = False) -> Dict[str, Any]:
+        payload = {
+            "messages": [
+                {"role": "user", "content": user_query}
+            ],
+            "temperature": 0.0,
+        }
+        if structured:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+
+    def api_url(self, path: str) -> str:
+        return f"{self.base_url.rstrip('/')}/openai/{path}?api-version={self.batch_api_version}"
+
+    def batch_body(self, user_query: str, structured: bool = False) -> Dict[str, Any]:
+        # Batch lines are routed by the model field instead of the deployment URL
+        return dict(self.payload(user_query, structured), model=self.model)
+
+
+class GeminiProvider(Provider):
+    name = 'gemini'
+    default_base_url = 'https://generativelanguage.googleapis.com/v1beta'
+
+    def url(self) -> str:
+        return f"{(self.base_url or self.default_base_url).rstrip('/')}/models/{self.model}:generateContent"
+
+    def headers(self) -> Dict[str, str]:
+        # Sent as a header rather than ?key= so the key stays out of logged URLs
+        return {
+            'Content-Type': 'application/json',
+            'x-goog-api-key': self.api_key
+        }
+
+    def payload(self, user_query: str, structured: bool = False) -> Dict[str, Any]:
+        payload = {
+            "contents": [{"parts": [{"text": user_query}]}],
+        }
+        if structured:
+            payload["generationConfig"] = {"responseMimeType": "application/json"}
+        return payload
+
+    def extract_text(self, result: Dict[str, Any]) -> Optional[str]:
+        try:
+            return result['candidates'][0]['content']['parts'][0].get('text')
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    def total_tokens(self, result: Dict[str, Any]) -> int:
+        return result.get('usageMetadata', {}).get('totalTokenCount', 0)
+
+    def is_rate_limited(self, response) -> bool:
+        return response.status_code == 429 or (response.status_code == 400 and "quota" in response.text.lower())
+
+
+PROVIDERS = {
+    'azure': AzureProvider,
+    'gemini': GeminiProvider,
+    'groq': OpenAICompatibleProvider,
+}
@@ -0,0 +1,113 @@
+import email.utils
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+from tracing import span
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # Requests larger than the bucket can never fit, so they only wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+
+class RateLimiter:
+    # Shared by every worker thread of one provider: proactively paces requests/min and tokens/min
+    def __init__(self, requests_per_minute: float, tokens_per_minute: Optional[float] = None,
+                 base_backoff: float = 2.0, max_backoff: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.requests.refill(now)
+                wait = max(self.paused_until - now, self.requests.wait_time(1))
+                if self.tokens is not None:
+                    self.tokens.refill(now)
+                    wait = max(wait, self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    self.requests.level -= 1
+                    if self.tokens is not None:
+                        self.tokens.level -= min(tokens, self.tokens.capacity)
+                    return
+            # Covers both the proactive rpm/tpm pacing and pauses set by a 429 from any worker
+            with span('rate_limit.wait', 'rate_limit'):
+                time.sleep(wait)
+
+    def record_usage(self, estimated: int, actual: int):
+        # Correct the token bucket once the response reports real usage; the level may go negative
+        if self.tokens is None or actual <= 0:
+            return
+        with self.lock:
+            self.tokens.level -= actual - estimated
+
+    def pause(self, seconds: float):
+        # A 429 means the quota is exhausted for everyone, so all workers hold off, not just the caller
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.requests.level = min(self.requests.level, 0.0)
+
+    def throttle(self, response, attempt: int) -> float:
+        # Honor Retry-After style hints from the server, falling back to jittered backoff
+        wait_time = retry_after_seconds(response)
+        if wait_time is None:
+            wait_time = self.backoff(attempt)
+        self.pause(wait_time)
+        return wait_time
+
+    def backoff(self, attempt: int) -> float:
+        # Fallback when the server gives no hint: full-jitter exponential backoff
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+
+def estimate_tokens(text: str, max_output_tokens: int = 256) -> int:
+    # Chinese prompts are roughly one token per character; this only needs to be close enough to pace requests
+    return len(text) + max_output_tokens
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    headers = response.headers
+    if headers.get('retry-after-ms'):
+        try:
+            return float(headers['retry-after-ms']) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                parsed = email.utils.parsedate_to_datetime(retry_after)
+                return max(0.0, parsed.timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    # Gemini puts the hint in the error body: {"error": {"details": [{"retryDelay": "17s"}]}}
+    match = re.search(r'"retryDelay"\s*:\s*"([\d.]+)s"', response.text or '')
+    if match:
+        return float(match.group(1))
+    return None
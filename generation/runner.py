@@ -0,0 +1,60 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+
+from .cache import ResponseCache
+from .dispatch import build_jobs, collect_results, dispatch_jobs
+from .journal import RunJournal
+from .prompts import OUTPUT_FIELDNAMES, write_csv
+from .providers import Provider
+
+
+def output_path(provider: Provider, output_dir: str, p_num: int, prompts: Dict[int, Dict[str, Any]]) -> str:
+    return os.path.join(output_dir, f"{provider.output_prefix}_prompt{p_num}_{prompts[p_num]['title']}.csv")
+
+
+def write_outputs(provider: Provider, results: Dict[int, List[Dict[str, str]]],
+                  prompts: Dict[int, Dict[str, Any]], output_dir: str):
+    for p_num, rows in results.items():
+        write_csv(output_path(provider, output_dir, p_num, prompts), OUTPUT_FIELDNAMES, rows)
+
+
+async def run_async(providers: List[Provider], data_rows: List[Dict[str, str]], prompts: Dict[int, Dict[str, Any]],
+                    output_dir: str, cache: Optional[ResponseCache] = None,
+                    checkpoint_every: int = 10, structured: bool = False) -> Dict[str, Dict[int, List[Dict[str, str]]]]:
+    # Every provider has its own in-flight limit and rate limiter, but they all share one event loop
+    jobs = build_jobs(data_rows, prompts, structured)
+    journals = {p.name: RunJournal(os.path.join(output_dir, f"{p.output_prefix}_journal.jsonl")) for p in providers}
+
+    def checkpoint_for(provider):
+        return lambda responses: write_outputs(provider, collect_results(jobs, responses, prompts), prompts, output_dir)
+
+    try:
+        all_responses = await asyncio.gather(*(
+            dispatch_jobs(jobs, p.call, p.max_in_flight, cache, p.name, p.model,
+                          journals[p.name], checkpoint_for(p), checkpoint_every)
+            for p in providers
+        ))
+    finally:
+        for journal in journals.values():
+            journal.close()
+
+    results = {}
+    for provider, responses in zip(providers, all_responses):
+        results[provider.name] = collect_results(jobs, responses, prompts)
+        write_outputs(provider, results[provider.name], prompts, output_dir)
+        # The outputs now hold every response; a kept journal would replay them into the next run
+        journals[provider.name].remove()
+    return results
+
+
+def run(providers: List[Provider], data_rows: List[Dict[str, str]], prompts: Dict[int, Dict[str, Any]],
+        output_dir: str = '.', cache_file: Optional[str] = 'llm_response_cache.sqlite',
+        checkpoint_every: int = 10, structured: bool = False) -> Dict[str, Dict[int, List[Dict[str, str]]]]:
+    os.makedirs(output_dir, exist_ok=True)
+    cache = ResponseCache(cache_file) if cache_file else None
+    try:
+        return asyncio.run(run_async(providers, data_rows, prompts, output_dir, cache, checkpoint_every, structured))
+    finally:
+        if cache is not None:
+            cache.close()
@@ -0,0 +1,63 @@
+import argparse
+
+import tracing
+from scoring.conditions import CONDITIONS, load_conditions
+from scoring.manifest import ScoreManifest, run_incremental
+from scoring.metrics import METRICS, run_metrics
+from scoring.sharding import run_sharded
+from scoring.storage import FORMATS, default_format, read_scores, scores_exist, write_scores
+
+OUTPUT_FILES = {'parquet': "datasets/scores_long.parquet", 'csv': "datasets/scores_long.csv"}
+METRICS_TO_RUN = ['cosine', 'psr', 'bleurt', 'bertscore']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the 9 condition files once and apply every metric.")
+    parser.add_argument('--metrics', nargs='+', choices=sorted(METRICS), default=METRICS_TO_RUN)
+    parser.add_argument('--format', choices=FORMATS, default=default_format(),
+                        help="Parquet dataset partitioned by model/prompt (needs pyarrow) or one CSV")
+    parser.add_argument('--output', default=None, help="Defaults to datasets/scores_long.parquet or .csv")
+    parser.add_argument('--num-threads', type=int, default=None)
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only rescore rows whose inputs changed since the last run and patch them into --output; "
+                             "metrics not in --metrics are kept")
+    parser.add_argument('--workers', type=int, default=1, help="Score row shards in this many processes")
+    parser.add_argument('--csi-glossary', default=None, help="Glossary CSV to score PSR against indexed CSI terms")
+    parser.add_argument('--psr-backend', choices=['fuzzywuzzy', 'rapidfuzz'], default='fuzzywuzzy',
+                        help="'rapidfuzz' is faster but does not reproduce the published PSR scores")
+    parser.add_argument('--inference-backend', choices=['fp32', 'int8', 'onnx'], default='fp32',
+                        help="int8 / ONNX CPU inference for the model metrics; check agreement with "
+                             "`python -m scoring.inference` first")
+    parser.add_argument('--trace', default=None, metavar='DIR',
+                        help="Write trace.json, a Chrome trace and Prometheus metrics for this run to DIR")
+    parser.add_argument('--metrics-port', type=int, default=None, help="Serve Prometheus metrics at :PORT/metrics")
+    args = parser.parse_args()
+    tracing.configure(args.trace, args.metrics_port)
+    output = args.output or OUTPUT_FILES[args.format]
+
+    table = load_conditions()
+    print(f"Loaded {len(table)} rows from {table['condition'].nunique()} condition files.")
+
+    def score(rows, names, **options):
+        if args.workers > 1:
+            return run_sharded(rows, names, workers=args.workers, **options)
+        return run_metrics(rows, names, psr_workers=args.num_threads or 1, **options)
+
+    options = dict(num_threads=args.num_threads, psr_backend=args.psr_backend, csi_glossary=args.csi_glossary,
+                   inference_backend=args.inference_backend)
+    paths = [path for path, _, _ in CONDITIONS]
+    # The manifest sits next to the results table it describes
+    manifest = ScoreManifest(output + '.manifest.json')
+    if args.incremental and scores_exist(output):
+        previous = read_scores(output)
+        results = run_incremental(table, args.metrics, paths, previous, manifest, score, **options)
+    else:
+        results = score(table, args.metrics, **options)
+        manifest.record(table, paths, args.metrics, options)
+    write_scores(results, output, args.format)
+    manifest.save()
+    print(f"Saved {len(results)} scores to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import importlib
+
+# Exports resolve on first access, so importing one submodule (scoring.psr for a PSR-only run) does not
+# pull pandas and every other submodule in through the package
+_EXPORTS = {
+    'CONDITIONS': '.conditions', 'load_conditions': '.conditions',
+    'CSIIndex': '.csi_index',
+    'EmbeddingStore': '.embedding_store',
+    'encode_texts': '.embeddings', 'encode_unique': '.embeddings', 'paired_cosine': '.embeddings',
+    'METRIC_OUTPUTS': '.metrics', 'METRICS': '.metrics', 'register_metric': '.metrics', 'run_metrics': '.metrics',
+    'ResultsStore': '.results', 'canonical_condition': '.results',
+    'run_sharded': '.sharding',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'scoring' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
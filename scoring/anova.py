@@ -0,0 +1,49 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+def _dummies(codes: np.ndarray, levels: int) -> np.ndarray:
+    # Treatment coding: the first level is the baseline, one indicator column per other level
+    return (codes[:, None] == np.arange(1, levels)[None, :]).astype(np.float64)
+
+
+def _rss(y: np.ndarray, blocks: List[np.ndarray]) -> tuple:
+    design = np.hstack([np.ones((len(y), 1))] + blocks)
+    coef, _, rank, _ = np.linalg.lstsq(design, y, rcond=None)
+    residual = y - design @ coef
+    return float(residual @ residual), int(rank)
+
+
+def two_way_anova(frame: pd.DataFrame, response: str, a: str, b: str) -> pd.DataFrame:
+    # Type II two-way ANOVA with interaction, laid out like statsmodels'
+    # anova_lm(ols(f'{response} ~ C(a) * C(b)'), typ=2), without importing statsmodels
+    from scipy.special import fdtrc
+
+    y = frame[response].to_numpy(dtype=np.float64)
+    codes_a, levels_a = pd.factorize(frame[a], sort=True)
+    codes_b, levels_b = pd.factorize(frame[b], sort=True)
+    da, db = _dummies(codes_a, len(levels_a)), _dummies(codes_b, len(levels_b))
+    dab = (da[:, :, None] * db[:, None, :]).reshape(len(y), -1)
+
+    rss_a, _ = _rss(y, [da])
+    rss_b, _ = _rss(y, [db])
+    rss_ab, rank_ab = _rss(y, [da, db])
+    rss_full, rank_full = _rss(y, [da, db, dab])
+    df_resid = len(y) - rank_full
+
+    # Each main effect is tested after the other one, the interaction after both
+    rows = {
+        f'C({a})': (rss_b - rss_ab, len(levels_a) - 1),
+        f'C({b})': (rss_a - rss_ab, len(levels_b) - 1),
+        f'C({a}):C({b})': (rss_ab - rss_full, rank_full - rank_ab),
+    }
+    table = pd.DataFrame({
+        'sum_sq': [ss for ss, _ in rows.values()] + [rss_full],
+        'df': [float(df) for _, df in rows.values()] + [float(df_resid)],
+    }, index=list(rows) + ['Residual'])
+    table['F'] = (table['sum_sq'] / table['df']) / (rss_full / df_resid)
+    table.loc['Residual', 'F'] = np.nan
+    table['PR(>F)'] = fdtrc(table['df'], df_resid, table['F'])
+    return table
@@ -0,0 +1,46 @@
+import os
+from typing import List, Tuple
+
+import pandas as pd
+
+from tracing import span
+
+# (file, model, prompt) for every model x prompt condition; names match the ANOVA factor levels
+CONDITIONS: List[Tuple[str, str, str]] = [
+    ('datasets/Gemini_Culture-aware.csv', 'Gemini', 'Culture-aware'),
+    ('datasets/Gemini_Title_and_Synopsis.csv', 'Gemini', 'Title & Synopsis'),
+    ('datasets/Gemini_Title-only.csv', 'Gemini', 'Title-only'),
+    ('datasets/gpt_Culture-aware.csv', 'GPT', 'Culture-aware'),
+    ('datasets/gpt_Title_and_Synopsis.csv', 'GPT', 'Title & Synopsis'),
+    ('datasets/gpt_Title-only.csv', 'GPT', 'Title-only'),
+    ('datasets/Llama_Culture-aware.csv', 'Llama', 'Culture-aware'),
+    ('datasets/Llama_Title_and_Synopsis.csv', 'Llama', 'Title & Synopsis'),
+    ('datasets/Llama_Title-only.csv', 'Llama', 'Title-only'),
+]
+
+# Positional columns shared by every condition file
+REFERENCE_COLUMN = 0     # English Title (official, used as reference)
+CHINESE_COLUMN = 1       # Chinese Title
+PREDICTION_COLUMN = 3    # Prompt_Response / extracted English title
+
+
+def load_conditions(conditions: List[Tuple[str, str, str]] = CONDITIONS) -> pd.DataFrame:
+    # Each file is parsed exactly once into one shared columnar table
+    frames = []
+    for path, model, prompt in conditions:
+        with span('csv.read', 'io', path=path):
+            df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        frames.append(pd.DataFrame({
+            'english_title': df.iloc[:, REFERENCE_COLUMN],
+            'chinese_title': df.iloc[:, CHINESE_COLUMN],
+            'model': model,
+            'prompt': prompt,
+            'condition': os.path.basename(path),
+            'reference': df.iloc[:, REFERENCE_COLUMN],
+            'prediction': df.iloc[:, PREDICTION_COLUMN],
+        }))
+
+    table = pd.concat(frames, ignore_index=True)
+    # A title keeps the same id in every condition, which is what paired statistics key on
+    table.insert(0, 'title_id', table.groupby(['english_title', 'chinese_title'], sort=False).ngroup())
+    return table
@@ -0,0 +1,158 @@
+import collections
+import csv
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .psr import best_csi_terms, psr_pairs
+
+NGRAM = 3
+
+
+class AhoCorasick:
+    # Finds every glossary term occurring in a Chinese string in one pass, however many terms there are
+    def __init__(self, patterns: Sequence[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[Set[int]] = [set()]
+
+        for term_id, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                if ch not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(set())
+                    self.goto[node][ch] = len(self.goto) - 1
+                node = self.goto[node][ch]
+            if pattern:
+                self.out[node].add(term_id)
+
+        # Breadth-first failure links; each node inherits the matches of its longest proper suffix.
+        # Depth-1 nodes keep the root as their failure link.
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.out[child] |= self.out[self.fail[child]]
+
+    def find(self, text: str) -> Set[int]:
+        matches, node = set(), 0
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            matches |= self.out[node]
+        return matches
+
+
+def ngrams(text: str, n: int = NGRAM) -> Set[str]:
+    text = f" {re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()} "
+    return {text[i:i + n] for i in range(max(len(text) - n + 1, 1))}
+
+
+class NGramIndex:
+    # Inverted index from character n-grams to English renderings, so only renderings sharing n-grams are ranked
+    def __init__(self, texts: Sequence[str], n: int = NGRAM):
+        self.n = n
+        self.postings: Dict[str, List[int]] = collections.defaultdict(list)
+        self.sizes = np.zeros(len(texts), dtype=np.int32)
+        for text_id, text in enumerate(texts):
+            grams = ngrams(text, n)
+            self.sizes[text_id] = len(grams)
+            for gram in grams:
+                self.postings[gram].append(text_id)
+
+    def search(self, text: str, top_k: int = 5, min_overlap: float = 0.5) -> List[int]:
+        # Coverage = share of a rendering's n-grams present in the text, which tracks partial_ratio's substring match
+        shared = collections.Counter()
+        for gram in ngrams(text, self.n):
+            shared.update(self.postings.get(gram, ()))
+        scored = [(count / self.sizes[text_id], text_id) for text_id, count in shared.items()]
+        scored = [item for item in scored if item[0] >= min_overlap]
+        return [text_id for _, text_id in sorted(scored, reverse=True)[:top_k]]
+
+
+def load_glossary(path: str) -> List[Tuple[str, str]]:
+    # Glossary CSV with 'Chinese' and 'English' columns; several English renderings may be separated by ';'
+    entries = []
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            for english in (row.get('English') or '').split(';'):
+                if english.strip():
+                    entries.append(((row.get('Chinese') or '').strip(), english.strip()))
+    return entries
+
+
+class CSIIndex:
+    def __init__(self, entries: Sequence[Tuple[str, str]], top_k: int = 5, min_overlap: float = 0.5):
+        self.chinese = [chinese for chinese, _ in entries]
+        self.english = [english for _, english in entries]
+        self.top_k = top_k
+        self.min_overlap = min_overlap
+        self.automaton = AhoCorasick(self.chinese)
+        self.ngram_index = NGramIndex(self.english)
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> 'CSIIndex':
+        return cls(load_glossary(path), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.english)
+
+    def candidates(self, chinese_title: str, prediction: str) -> List[int]:
+        # Renderings of terms that occur in the source title, plus the closest renderings by n-gram overlap
+        found = self.automaton.find(chinese_title or '')
+        found.update(self.ngram_index.search(prediction or '', self.top_k, self.min_overlap))
+        return sorted(found)
+
+    def psr_scores(self, chinese_titles: Sequence[str], references: Sequence[str], predictions: Sequence[str],
+                   backend: str = 'fuzzywuzzy', workers: int = 1,
+                   reference_fallback: bool = False) -> Tuple[np.ndarray, List[Optional[str]], np.ndarray]:
+        # Best PSR per row over its candidate terms only. Rows without candidates are scored against the whole
+        # glossary, as psr.psr_scores would; with reference_fallback they are scored against their reference title
+        # instead (so does every row when the glossary is empty). The third array marks rows scored that way.
+        rows, targets, matched = [], [], []
+        for i, (chinese, prediction) in enumerate(zip(chinese_titles, predictions)):
+            terms = [self.english[t] for t in self.candidates(chinese, prediction)]
+            matched.append(terms)
+            rows.extend([i] * len(terms))
+            targets.extend(terms)
+
+        flat = psr_pairs([predictions[i] for i in rows], targets, backend, workers)
+        scores = np.zeros(len(matched), dtype=np.float32)
+        best: List[Optional[str]] = [None] * len(matched)
+        start = 0
+        for i, terms in enumerate(matched):
+            block = flat[start:start + len(terms)]
+            start += len(terms)
+            if terms:
+                scores[i] = block.max()
+                best[i] = terms[int(block.argmax())]
+
+        unmatched = [i for i, terms in enumerate(matched) if not terms]
+        from_reference = np.zeros(len(matched), dtype=bool)
+        if unmatched and self.english and not reference_fallback:
+            unmatched_scores, term_ids = best_csi_terms([predictions[i] for i in unmatched], self.english,
+                                                        backend, workers)
+            for i, score, term_id in zip(unmatched, unmatched_scores, term_ids):
+                scores[i], best[i] = score, self.english[term_id]
+        elif unmatched:
+            scores[unmatched] = psr_pairs([predictions[i] for i in unmatched], [references[i] for i in unmatched],
+                                          backend, workers)
+            from_reference[unmatched] = True
+            for i in unmatched:
+                best[i] = references[i]
+
+        empty = [i for i in range(len(matched)) if not references[i] or not predictions[i]]
+        scores[empty] = 0.0
+        from_reference[empty] = False
+        for i in empty:
+            best[i] = None
+        return scores, best, from_reference
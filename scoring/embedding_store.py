@@ -0,0 +1,90 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, so run one writer at a time
+    fcntl = None
+
+
+class EmbeddingStore:
+    # One float32 .npy matrix per model, memory-mapped on load, plus a JSON index from text hash to row
+    def __init__(self, directory: str, model_name: str):
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.matrix_path = os.path.join(directory, f"{slug}.npy")
+        self.index_path = os.path.join(directory, f"{slug}.index.json")
+        self.lock_path = os.path.join(directory, f"{slug}.lock")
+        self.model_name = model_name
+
+        self.index: Dict[str, int] = {}
+        self.matrix = None
+        self.reload()
+
+    def reload(self):
+        if os.path.exists(self.matrix_path) and os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+            self.matrix = np.load(self.matrix_path, mmap_mode='r')
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # Sharded workers share one store; writers take turns and each merges what the others already added
+        with open(self.lock_path, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+
+    @classmethod
+    def key(cls, text: str) -> str:
+        return hashlib.sha1(cls.normalize(text).encode('utf-8')).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, texts: List[str], embeddings: np.ndarray):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._locked():
+            self.reload()
+            keep = [i for i, text in enumerate(texts) if self.key(text) not in self.index]
+            if not keep:
+                return
+            start = len(self.index)
+            for offset, i in enumerate(keep):
+                self.index[self.key(texts[i])] = start + offset
+            matrix = embeddings[keep] if self.matrix is None else np.concatenate([np.asarray(self.matrix), embeddings[keep]])
+
+            # Write both files aside and swap them in so an interrupted run never leaves them out of sync
+            np.save(self.matrix_path + '.tmp.npy', matrix)
+            with open(self.index_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(self.matrix_path + '.tmp.npy', self.matrix_path)
+            os.replace(self.index_path + '.tmp', self.index_path)
+            self.matrix = np.load(self.matrix_path, mmap_mode='r')
+
+    def embed(self, texts: Sequence[str],
+              encode: Callable[[List[str]], np.ndarray]) -> Tuple[np.ndarray, Dict[str, int]]:
+        # Same contract as encode_unique, but only strings the store has never seen are passed to encode()
+        unique = list(dict.fromkeys(texts))
+        missing = list(dict.fromkeys(self.normalize(t) for t in unique if self.key(t) not in self.index))
+        if missing:
+            print(f"Encoding {len(missing)} new texts ({len(unique) - len(missing)} reused from {self.matrix_path})")
+            self.add(missing, encode(missing))
+
+        rows = [self.index[self.key(t)] for t in unique]
+        return np.asarray(self.matrix[rows]), {text: i for i, text in enumerate(unique)}
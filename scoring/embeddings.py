@@ -0,0 +1,22 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from tracing import span
+
+
+def encode_texts(model, texts: List[str], batch_size: int = 256) -> np.ndarray:
+    with span('encode', 'cpu', texts=len(texts), batch_size=batch_size):
+        return model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                            normalize_embeddings=True, show_progress_bar=False)
+
+
+def encode_unique(model, texts: Sequence[str], batch_size: int = 256) -> Tuple[np.ndarray, Dict[str, int]]:
+    # Each distinct string is encoded once, however many files or rows it appears in
+    unique = list(dict.fromkeys(texts))
+    return encode_texts(model, unique, batch_size), {text: i for i, text in enumerate(unique)}
+
+
+def paired_cosine(embeddings: np.ndarray, index_a: List[int], index_b: List[int]) -> np.ndarray:
+    # Rows are L2-normalized, so cosine similarity is a row-wise dot product
+    return np.einsum('ij,ij->i', embeddings[index_a], embeddings[index_b])
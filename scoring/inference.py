@@ -0,0 +1,206 @@
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 'fp32' is the reference path (evaluate's BLEURT and BERTScore, sentence-transformers on torch).
+# 'int8' applies dynamic int8 quantization to every Linear layer of the torch models, for CPU-only hosts.
+# 'onnx' runs MiniLM on ONNX Runtime; BERTScore reads intermediate hidden states and BLEURT-20 ships as a
+# TensorFlow checkpoint, so for those two 'onnx' is not available and 'int8' is the fast CPU path.
+INFERENCE_BACKENDS = ('fp32', 'int8', 'onnx')
+
+# BLEURT has no torch model in evaluate; the int8 path uses the PyTorch port of the same checkpoints
+# (pip install git+https://github.com/lucadiliello/bleurt-pytorch.git)
+TORCH_BLEURT_CHECKPOINTS = {
+    'bleurt-20': 'lucadiliello/BLEURT-20',
+    'bleurt-20-d12': 'lucadiliello/BLEURT-20-D12',
+    'bleurt-base-128': 'lucadiliello/bleurt-base-128',
+}
+
+
+def check_backend(backend: str, metric: str):
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {INFERENCE_BACKENDS}")
+    if backend == 'onnx' and metric != 'cosine':
+        raise ValueError(f"The onnx backend only covers the cosine (MiniLM) model; use 'int8' for {metric}")
+
+
+def quantize_dynamic(model):
+    # Weights of every Linear layer stored as int8 and activations quantized on the fly: roughly 4x smaller
+    # matmul weights and faster CPU inference, with no calibration data
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_sentence_model(name: str, backend: str = 'fp32'):
+    from sentence_transformers import SentenceTransformer
+
+    check_backend(backend, 'cosine')
+    if backend == 'onnx':
+        # Exported on first load (needs sentence-transformers[onnx]); the hub ships an ONNX file for MiniLM
+        return SentenceTransformer(name, backend='onnx')
+    model = SentenceTransformer(name, device='cpu' if backend == 'int8' else None)
+    return quantize_dynamic(model) if backend == 'int8' else model
+
+
+class Int8Bleurt:
+    # BLEURT on the PyTorch port with int8 Linear layers. Shaped like evaluate's BLEURT module, whose .scorer
+    # does the batched scoring, so SemanticScorer uses either one the same way.
+    def __init__(self, checkpoint: str = 'bleurt-20', max_length: int = 512):
+        try:
+            from bleurt_pytorch import BleurtForSequenceClassification, BleurtTokenizer
+        except ImportError:
+            raise ImportError("The int8 BLEURT backend needs the PyTorch port: "
+                              "pip install git+https://github.com/lucadiliello/bleurt-pytorch.git")
+        name = TORCH_BLEURT_CHECKPOINTS.get(checkpoint.lower(), checkpoint)
+        self.tokenizer = BleurtTokenizer.from_pretrained(name)
+        self.model = quantize_dynamic(BleurtForSequenceClassification.from_pretrained(name).eval())
+        self.max_length = max_length
+
+    @property
+    def scorer(self) -> 'Int8Bleurt':
+        return self
+
+    def score(self, references: List[str], candidates: List[str], batch_size: int = 64) -> List[float]:
+        import torch
+
+        scores = []
+        with torch.inference_mode():
+            for start in range(0, len(references), batch_size):
+                inputs = self.tokenizer(references[start:start + batch_size], candidates[start:start + batch_size],
+                                        padding='longest', truncation=True, max_length=self.max_length,
+                                        return_tensors='pt')
+                scores.extend(self.model(**inputs).logits.flatten().tolist())
+        return scores
+
+
+class Int8BertScore:
+    # bert_score's BERTScorer (what evaluate's bertscore wraps) with its model quantized to int8. Exposes the same
+    # compute() as the evaluate module; the scorer is built once per model type.
+    def __init__(self):
+        self._scorers = {}
+
+    def compute(self, predictions: List[str], references: List[str], lang: str = 'en', model_type: Optional[str] = None,
+                batch_size: int = 64, nthreads: int = 4, **kwargs) -> Dict[str, List[float]]:
+        from bert_score import BERTScorer
+
+        key = (model_type, lang)
+        if key not in self._scorers:
+            # Quantized kernels are CPU-only, whatever device the fp32 path would have used
+            scorer = BERTScorer(model_type=model_type, lang=None if model_type else lang, device='cpu',
+                                batch_size=batch_size, nthreads=nthreads)
+            scorer._model = quantize_dynamic(scorer._model.eval())
+            self._scorers[key] = scorer
+        precision, recall, f1 = self._scorers[key].score(predictions, references, batch_size=batch_size)
+        return {'precision': precision.tolist(), 'recall': recall.tolist(), 'f1': f1.tolist()}
+
+
+def _rss_mb() -> Optional[float]:
+    # psutil is optional; without it the agreement table just has no memory columns
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def _run(metric: str, backend: str, references: List[str], predictions: List[str],
+         options: Dict[str, Any]) -> Dict[str, Any]:
+    # Each backend runs in a fresh process (see agreement), so load time and memory are its own
+    from .metrics import METRICS
+    import pandas as pd
+
+    table = pd.DataFrame({'reference': references, 'prediction': predictions, 'chinese_title': [''] * len(references)})
+    # A pair outside the sample loads the model, so score_seconds is inference only
+    warm_up = pd.DataFrame({'reference': ['warm up'], 'prediction': ['warm up'], 'chinese_title': ['']})
+    rss = _rss_mb()
+    # A throwaway embedding store, so cosine is encoded from scratch rather than read back from disk
+    with tempfile.TemporaryDirectory() as store_dir:
+        options = dict(options, inference_backend=backend, embedding_store_dir=store_dir)
+        start = time.perf_counter()
+        METRICS[metric](warm_up, **options)
+        loaded = time.perf_counter()
+        scores = METRICS[metric](table, **options)
+        done = time.perf_counter()
+    return {'scores': {name: np.asarray(values, dtype=np.float64) for name, values in scores.items()},
+            'load_seconds': loaded - start, 'score_seconds': done - loaded,
+            'rss_mb': None if rss is None else _rss_mb() - rss}
+
+
+def agreement(metrics: Sequence[str], backend: str, references: List[str], predictions: List[str],
+              options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    # Scores the same pairs on the fp32 reference path and on backend, and reports how far the scores move
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from scipy.stats import pearsonr, spearmanr
+
+    rows = []
+    for metric in metrics:
+        check_backend(backend, metric)
+        runs = {}
+        for name in ('fp32', backend):
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                runs[name] = pool.submit(_run, metric, name, references, predictions, options or {}).result()
+        reference, candidate = runs['fp32'], runs[backend]
+        for output, expected in reference['scores'].items():
+            actual = candidate['scores'][output]
+            delta = np.abs(actual - expected)
+            row = {
+                'metric': output,
+                'backend': backend,
+                'n': len(expected),
+                'mean_abs_delta': float(delta.mean()),
+                'p99_abs_delta': float(np.percentile(delta, 99)),
+                'max_abs_delta': float(delta.max()),
+                'pearson': float(pearsonr(expected, actual)[0]),
+                'spearman': float(spearmanr(expected, actual)[0]),
+                'fp32_seconds': reference['score_seconds'],
+                'backend_seconds': candidate['score_seconds'],
+                'speedup': reference['score_seconds'] / max(candidate['score_seconds'], 1e-9),
+            }
+            if reference['rss_mb'] is not None:
+                row.update(fp32_rss_mb=reference['rss_mb'], backend_rss_mb=candidate['rss_mb'])
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a fast CPU inference backend against the fp32 reference "
+                                                 "scores on real condition pairs.")
+    parser.add_argument('--backend', choices=[b for b in INFERENCE_BACKENDS if b != 'fp32'], default='int8')
+    parser.add_argument('--metrics', nargs='+', choices=['bleurt', 'bertscore', 'cosine'], default=None,
+                        help="Defaults to every metric the backend supports")
+    parser.add_argument('--sample', type=int, default=300, help="Pairs drawn from the 9 condition files")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--num-threads', type=int, default=None)
+    parser.add_argument('--max-delta', type=float, default=None,
+                        help="Exit non-zero if any score moves by more than this")
+    parser.add_argument('--output', default=None, help="Save the agreement table as CSV")
+    args = parser.parse_args()
+
+    import pandas as pd
+    from .conditions import load_conditions
+
+    metrics = args.metrics or (['cosine'] if args.backend == 'onnx' else ['bleurt', 'bertscore', 'cosine'])
+    table = load_conditions()
+    sample = table.sample(min(args.sample, len(table)), random_state=args.seed)
+    options = {'num_threads': args.num_threads} if args.num_threads else {}
+    rows = agreement(metrics, args.backend, sample['reference'].str.strip().tolist(),
+                     sample['prediction'].str.strip().tolist(), options)
+
+    report = pd.DataFrame(rows)
+    print(report.round(4).to_string(index=False))
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        report.to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"Saved agreement table to: {args.output}")
+    if args.max_delta is not None and (report['max_abs_delta'] > args.max_delta).any():
+        print(f"FAIL: scores moved by more than {args.max_delta}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
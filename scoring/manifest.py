@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .metrics import ID_COLUMNS, METRIC_OUTPUTS
+
+KEY_COLUMNS = ['model', 'prompt', 'english_title', 'chinese_title']
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def row_keys(frame: pd.DataFrame) -> pd.Series:
+    # (model, prompt, title) plus an occurrence counter, so repeated titles in one condition stay distinct
+    occurrence = frame.groupby(KEY_COLUMNS, sort=False).cumcount().astype(str)
+    return frame[KEY_COLUMNS].astype(str).agg('\x1f'.join, axis=1) + '\x1f' + occurrence
+
+
+def row_hashes(table: pd.DataFrame) -> pd.Series:
+    # Everything a metric reads from a row: the reference, the prediction and the Chinese title
+    text = table['reference'] + '\x1f' + table['prediction'] + '\x1f' + table['chinese_title']
+    return text.map(lambda t: hashlib.sha1(t.encode('utf-8')).hexdigest())
+
+
+def options_fingerprint(options: Dict[str, Any]) -> str:
+    # Worker and thread counts do not change scores, so they do not invalidate earlier results
+    relevant = {k: v for k, v in options.items() if k not in ('num_threads', 'psr_workers', 'workers')}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ScoreManifest:
+    # Records what every score in a long results table was computed from: input file hashes,
+    # per-row content hashes and the options each metric ran with
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, str] = {}
+        self.rows: Dict[str, str] = {}
+        self.metrics: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.files, self.rows, self.metrics = data['files'], data['rows'], data['metrics']
+
+    def changed_files(self, paths: List[str]) -> List[str]:
+        return [path for path in paths if self.files.get(path) != file_hash(path)]
+
+    def stale_rows(self, table: pd.DataFrame, keys: pd.Series, hashes: pd.Series, metric: str,
+                   fingerprint: str) -> np.ndarray:
+        if self.metrics.get(metric) != fingerprint:
+            return np.ones(len(table), dtype=bool)
+        return (keys.map(self.rows) != hashes).to_numpy(copy=True)
+
+    def record(self, table: pd.DataFrame, paths: List[str], names: List[str], options: Dict[str, Any],
+               kept: Optional[List[str]] = None):
+        # kept: metrics carried over unchanged from the previous results table, which keep their fingerprints;
+        # any other metric left out of this run is not in its results table, so it starts fresh next time
+        self.files = {path: file_hash(path) for path in paths}
+        self.rows = dict(zip(row_keys(table), row_hashes(table)))
+        fingerprint = options_fingerprint(options)
+        self.metrics = dict({name: self.metrics[name] for name in kept or [] if name in self.metrics},
+                            **{name: fingerprint for name in names})
+
+    def save(self):
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'files': self.files, 'rows': self.rows, 'metrics': self.metrics}, f)
+        os.replace(self.path + '.tmp', self.path)
+
+
+def run_incremental(table: pd.DataFrame, names: List[str], paths: List[str], previous: pd.DataFrame,
+                    manifest: ScoreManifest, run: Callable[..., pd.DataFrame], **options) -> pd.DataFrame:
+    # Scores only rows whose inputs or metric options changed since the manifest was written, then splices
+    # them into the previous long table. Requested metrics come first, ordered exactly like a full run; metrics
+    # that were not requested are carried over from the previous table.
+    changed = manifest.changed_files(paths)
+    print(f"{len(changed)} of {len(paths)} input files changed since the last run")
+
+    keys, hashes = row_keys(table), row_hashes(table)
+    fingerprint = options_fingerprint(options)
+    previous_groups = {}
+    if len(previous):
+        # Keys are counted per metric: the long table repeats every (model, prompt, title) once per metric output
+        previous_groups = {metric: group.assign(key=row_keys(group).to_numpy())
+                           for metric, group in previous.groupby('metric', sort=False)}
+    previous_scores = {metric: dict(zip(group['key'], group['score'])) for metric, group in previous_groups.items()}
+
+    frames = []
+    for name in names:
+        stale = manifest.stale_rows(table, keys, hashes, name, fingerprint)
+        outputs = METRIC_OUTPUTS[name]
+        scores = {output: keys.map(previous_scores.get(output, {})).to_numpy(dtype=np.float32, copy=True) for output in outputs}
+        # A row whose earlier score is missing from the results table is recomputed as well
+        for output in outputs:
+            stale |= np.isnan(scores[output])
+
+        print(f"{name}: rescoring {int(stale.sum())} of {len(table)} rows")
+        if stale.any():
+            fresh = run(table[stale], [name], **options)
+            for output in outputs:
+                scores[output][stale] = fresh.loc[fresh['metric'] == output, 'score'].to_numpy()
+        for output in outputs:
+            frames.append(table[ID_COLUMNS].assign(metric=output, score=scores[output]))
+
+    # Carried-over rows whose inputs changed (or that are gone) are dropped rather than kept stale, so the next
+    # run of that metric rescores them
+    requested = {output for name in names for output in METRIC_OUTPUTS[name]}
+    current = {key for key, row_hash in zip(keys, hashes) if manifest.rows.get(key) == row_hash}
+    for output, group in previous_groups.items():
+        if output not in requested:
+            frames.append(group[group['key'].isin(current)].drop(columns='key'))
+    kept = [name for name in manifest.metrics if name not in names]
+
+    manifest.record(table, paths, names, options, kept)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,107 @@
+import functools
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tracing import span
+
+from .csi_index import CSIIndex
+from .embedding_store import EmbeddingStore
+from .embeddings import encode_texts, paired_cosine
+from .inference import load_sentence_model
+from .psr import psr_scores
+
+# Every plugin takes the shared condition table and returns {metric name: scores aligned with its rows}
+METRICS: Dict[str, Callable[..., Dict[str, np.ndarray]]] = {}
+METRIC_OUTPUTS: Dict[str, List[str]] = {}
+
+ID_COLUMNS = ['title_id', 'english_title', 'chinese_title', 'model', 'prompt']
+
+
+def register_metric(name: str, outputs: Optional[List[str]] = None):
+    # outputs lists the score columns a plugin returns, so sharded runs can size their result arrays up front
+    def decorator(fn):
+        METRICS[name] = fn
+        METRIC_OUTPUTS[name] = outputs or [name]
+        return fn
+    return decorator
+
+
+_semantic_scorers = {}
+
+
+def semantic_scorer(bleurt_checkpoint: str = "bleurt-20", bertscore_model: Optional[str] = None,
+                    semantic_batch_size: int = 64, num_threads: Optional[int] = None,
+                    inference_backend: str = 'fp32', **options):
+    # BLEURT and BERTScore plugins share one scorer per configuration, so models load once per run
+    key = (bleurt_checkpoint, bertscore_model, semantic_batch_size, num_threads, inference_backend)
+    if key not in _semantic_scorers:
+        from .semantic import SemanticScorer
+        _semantic_scorers[key] = SemanticScorer(bleurt_checkpoint, bertscore_model,
+                                                batch_size=semantic_batch_size, num_threads=num_threads,
+                                                backend=inference_backend)
+    return _semantic_scorers[key]
+
+
+@functools.lru_cache(maxsize=None)
+def sentence_model(name: str, backend: str = 'fp32'):
+    # Loaded once per process, which in a sharded run means once per worker
+    with span('model.load', 'model', model=name, backend=backend):
+        return load_sentence_model(name, backend)
+
+
+@register_metric('cosine')
+def cosine_metric(table: pd.DataFrame, embedding_model: str = 'all-MiniLM-L6-v2', embedding_batch_size: int = 256,
+                  embedding_store_dir: str = 'datasets/embeddings', inference_backend: str = 'fp32',
+                  **options) -> Dict[str, np.ndarray]:
+    def encode(missing):
+        return encode_texts(sentence_model(embedding_model, inference_backend), missing, embedding_batch_size)
+
+    # Quantized or ONNX vectors differ slightly from fp32 ones, so each backend keeps its own store
+    store_name = embedding_model if inference_backend == 'fp32' else f"{embedding_model}-{inference_backend}"
+    store = EmbeddingStore(embedding_store_dir, store_name)
+    references, predictions = table['reference'].tolist(), table['prediction'].tolist()
+    embeddings, index = store.embed(references + predictions, encode)
+    return {'cosine': paired_cosine(embeddings, [index[t] for t in references], [index[t] for t in predictions])}
+
+
+@functools.lru_cache(maxsize=None)
+def csi_index(path: str) -> CSIIndex:
+    return CSIIndex.from_csv(path)
+
+
+@register_metric('psr')
+def psr_metric(table: pd.DataFrame, csi_terms: Optional[List[str]] = None, psr_backend: str = 'fuzzywuzzy',
+               psr_workers: int = 1, csi_glossary: Optional[str] = None, **options) -> Dict[str, np.ndarray]:
+    if csi_glossary:
+        index = csi_index(csi_glossary)
+        return {'psr': index.psr_scores(table['chinese_title'].tolist(), table['reference'].tolist(),
+                                        table['prediction'].tolist(), backend=psr_backend, workers=psr_workers)[0]}
+    return {'psr': psr_scores(table['reference'].tolist(), table['prediction'].tolist(), csi_terms or [],
+                              backend=psr_backend, workers=psr_workers)}
+
+
+@register_metric('bleurt')
+def bleurt_metric(table: pd.DataFrame, **options) -> Dict[str, np.ndarray]:
+    scorer = semantic_scorer(**options)
+    return {'bleurt': scorer.bleurt_scores(table['reference'].str.strip().tolist(),
+                                           table['prediction'].str.strip().tolist())}
+
+
+@register_metric('bertscore', outputs=['bertscore_p', 'bertscore_r', 'bertscore_f1'])
+def bertscore_metric(table: pd.DataFrame, **options) -> Dict[str, np.ndarray]:
+    scorer = semantic_scorer(**options)
+    scores = scorer.bertscore_scores(table['reference'].str.strip().tolist(),
+                                     table['prediction'].str.strip().tolist())
+    return {'bertscore_p': scores['precision'], 'bertscore_r': scores['recall'], 'bertscore_f1': scores['f1']}
+
+
+def run_metrics(table: pd.DataFrame, names: List[str], **options) -> pd.DataFrame:
+    # Long format: one row per (title, model, prompt, metric), so a new metric only appends rows
+    frames = []
+    for name in names:
+        print(f"Running metric: {name}")
+        for metric, scores in METRICS[name](table, **options).items():
+            frames.append(table[ID_COLUMNS].assign(metric=metric, score=np.asarray(scores, dtype=np.float32)))
+    return pd.concat(frames, ignore_index=True)
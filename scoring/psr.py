@@ -0,0 +1,121 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from tracing import span
+
+# 'fuzzywuzzy' reproduces the published CSI-Match scores exactly. 'rapidfuzz' is a multi-threaded C++ cdist, but
+# its partial_ratio searches for the optimal alignment, so its scores differ from fuzzywuzzy's heuristic on many pairs.
+BACKENDS = ('fuzzywuzzy', 'rapidfuzz')
+
+
+def calculate_psr_for_row(reference, generated, csi_terms):
+    from fuzzywuzzy import fuzz
+
+    if not reference or not generated:
+        return 0.0
+
+    comp = csi_terms if csi_terms else [reference]
+    max_psr = 0.0
+
+    for target in comp:
+        if not target:
+            continue
+        psr_score = fuzz.partial_ratio(str(target).lower(), str(generated).lower()) / 100.0
+        max_psr = max(max_psr, psr_score)
+
+    return max_psr
+
+
+def normalize(texts: Sequence[str]) -> List[str]:
+    # Lowercased once up front instead of on every comparison
+    return [str(text).lower() for text in texts]
+
+
+def _fuzzywuzzy_block(args) -> np.ndarray:
+    from fuzzywuzzy import fuzz
+
+    queries, choices, pairwise = args
+    if pairwise:
+        return np.array([fuzz.partial_ratio(c, q) for q, c in zip(queries, choices)], dtype=np.float32)
+    return np.array([[fuzz.partial_ratio(c, q) for c in choices] for q in queries], dtype=np.float32).reshape(len(queries), len(choices))
+
+
+def _fuzzywuzzy(queries: List[str], choices: List[str], pairwise: bool, workers: int) -> np.ndarray:
+    if workers <= 1 or len(queries) < 2 * workers:
+        return _fuzzywuzzy_block((queries, choices, pairwise))
+    # Row shards go to a process pool; pairwise mode shards the choices alongside their queries
+    bounds = np.linspace(0, len(queries), workers + 1).astype(int)
+    shards = [(queries[s:e], choices[s:e] if pairwise else choices, pairwise) for s, e in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return np.concatenate(list(pool.map(_fuzzywuzzy_block, shards)))
+
+
+def _rapidfuzz(queries: List[str], choices: List[str], pairwise: bool, workers: int) -> np.ndarray:
+    from rapidfuzz import fuzz, process
+
+    # partial_ratio is symmetric in which string is the needle, so (choice, query) order needs no care here
+    if pairwise:
+        return process.cpdist(choices, queries, scorer=fuzz.partial_ratio, workers=workers, dtype=np.float32)
+    return process.cdist(queries, choices, scorer=fuzz.partial_ratio, workers=workers, dtype=np.float32)
+
+
+def _score(queries: List[str], choices: List[str], pairwise: bool, backend: str, workers: int) -> np.ndarray:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PSR backend '{backend}', expected one of {BACKENDS}")
+    if not queries or (not pairwise and not choices):
+        return np.zeros((len(queries),) if pairwise else (len(queries), len(choices)), dtype=np.float32)
+    scorer = _rapidfuzz if backend == 'rapidfuzz' else _fuzzywuzzy
+    with span('psr.match', 'cpu', backend=backend, queries=len(queries), choices=len(choices), pairwise=pairwise):
+        return scorer(queries, choices, pairwise, workers) / 100.0
+
+
+def psr_matrix(predictions: Sequence[str], terms: Sequence[str], backend: str = 'fuzzywuzzy',
+               workers: int = 1) -> np.ndarray:
+    # Full prediction x term score matrix; predictions and terms are normalized and de-duplicated once, and the
+    # unique scores are expanded back so rows and columns still line up with the inputs
+    queries, choices = normalize(predictions), normalize(terms)
+    unique_queries, unique_choices = list(dict.fromkeys(queries)), list(dict.fromkeys(choices))
+    unique = _score(unique_queries, unique_choices, False, backend, workers)
+    rows = {text: i for i, text in enumerate(unique_queries)}
+    columns = {text: i for i, text in enumerate(unique_choices)}
+    return unique[np.ix_([rows[q] for q in queries], [columns[c] for c in choices])]
+
+
+def psr_pairs(predictions: Sequence[str], targets: Sequence[str], backend: str = 'fuzzywuzzy',
+              workers: int = 1) -> np.ndarray:
+    # Element-wise PSR of predictions[i] against targets[i]
+    return _score(normalize(predictions), normalize(targets), True, backend, workers)
+
+
+def best_csi_terms(predictions: Sequence[str], terms: Sequence[str], backend: str = 'fuzzywuzzy',
+                   workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    # Best PSR per prediction and the index of the term that produced it
+    matrix = psr_matrix(predictions, terms, backend, workers)
+    if matrix.shape[1] == 0:
+        return np.zeros(len(predictions), dtype=np.float32), np.full(len(predictions), -1)
+    best = matrix.argmax(axis=1)
+    return matrix[np.arange(len(best)), best], best
+
+
+def psr_scores(references: Sequence[str], predictions: Sequence[str], csi_terms: List[str],
+               backend: str = 'fuzzywuzzy', workers: int = 1) -> np.ndarray:
+    # Vectorized calculate_psr_for_row over many rows
+    predictions = list(predictions)
+    references = list(references)
+    terms = [t for t in csi_terms if t]
+
+    if terms:
+        scores = best_csi_terms(predictions, terms, backend, workers)[0]
+    else:
+        # Without a glossary every prediction is compared against its own reference; repeated pairs are scored once
+        pairs = list(dict.fromkeys(zip(normalize(references), normalize(predictions))))
+        unique = _score([p for _, p in pairs], [r for r, _ in pairs], True, backend, workers)
+        position = {pair: i for i, pair in enumerate(pairs)}
+        scores = unique[[position[pair] for pair in zip(normalize(references), normalize(predictions))]]
+
+    empty = np.array([not ref or not pred for ref, pred in zip(references, predictions)], dtype=bool)
+    scores = np.asarray(scores, dtype=np.float32)
+    scores[empty] = 0.0
+    return scores
@@ -0,0 +1,106 @@
+import argparse
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .results import ResultsStore
+from .storage import scores_exist
+
+GROUP = ['metric', 'model', 'prompt']
+
+
+def summarize(store: ResultsStore, metrics: Optional[List[str]] = None, confidence: float = 0.95) -> pd.DataFrame:
+    # Every statistic for every (metric, model, prompt) cell in one grouped aggregation
+    from scipy.special import stdtrit
+
+    frame = store.query(metric=metrics)
+    summary = frame.assign(abs_score=frame['score'].abs()).groupby(GROUP, observed=True, sort=True).agg(
+        n=('score', 'size'),
+        mean=('score', 'mean'),
+        std=('score', 'std'),
+        mean_abs=('abs_score', 'mean'),
+        median=('score', 'median'),
+    ).reset_index()
+
+    # t-interval for the mean of each cell
+    half_width = stdtrit(summary['n'] - 1, (1 + confidence) / 2) * summary['std'] / np.sqrt(summary['n'])
+    summary['ci_low'] = summary['mean'] - half_width
+    summary['ci_high'] = summary['mean'] + half_width
+
+    # Rank 1 is the best condition for the metric: highest mean, and lowest spread for rank_std
+    by_metric = summary.groupby('metric', observed=True)
+    summary['rank_mean'] = by_metric['mean'].rank(ascending=False, method='min').astype(int)
+    summary['rank_std'] = by_metric['std'].rank(ascending=True, method='min').astype(int)
+    return summary
+
+
+def pivot(summary: pd.DataFrame, metric: str, value: str = 'mean') -> pd.DataFrame:
+    return summary[summary['metric'] == metric].pivot(index='model', columns='prompt', values=value)
+
+
+def best_conditions(summary: pd.DataFrame) -> pd.DataFrame:
+    # Per metric: the condition with the highest mean, the one with the lowest std, and the best model on average
+    rows = []
+    for metric, group in summary.groupby('metric', observed=True):
+        best_mean = group.loc[group['mean'].idxmax()]
+        best_std = group.loc[group['std'].idxmin()]
+        model_means = group.groupby('model', observed=True)['mean'].mean()
+        model_stds = group.groupby('model', observed=True)['std'].mean()
+        rows.append({
+            'metric': metric,
+            'highest_mean': f"{best_mean['model']} / {best_mean['prompt']}",
+            'highest_mean_value': best_mean['mean'],
+            'lowest_std': f"{best_std['model']} / {best_std['prompt']}",
+            'lowest_std_value': best_std['std'],
+            'best_model_mean': model_means.idxmax(),
+            'most_consistent_model': model_stds.idxmin(),
+        })
+    return pd.DataFrame(rows)
+
+
+def build_report(store: ResultsStore, metrics: Optional[List[str]] = None,
+                 confidence: float = 0.95) -> Dict[str, pd.DataFrame]:
+    summary = summarize(store, metrics, confidence)
+    return {'summary': summary, 'best': best_conditions(summary)}
+
+
+def print_metric(report: Dict[str, pd.DataFrame], metric: str, values: tuple = ('mean', 'std')):
+    for value in values:
+        print(pivot(report['summary'], metric, value).round(4))
+        print("-" * 70)
+
+
+def save_report(report: Dict[str, pd.DataFrame], directory: str):
+    os.makedirs(directory, exist_ok=True)
+    for name, table in report.items():
+        table.to_csv(os.path.join(directory, f"{name}.csv"), index=False, encoding='utf-8-sig')
+
+
+def load_store(path: str) -> ResultsStore:
+    # The pipeline's long table when it exists, otherwise the wide combined_* tables from the calc_* scripts
+    if path and scores_exist(path):
+        return ResultsStore.load(path)
+    return ResultsStore.from_legacy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summary statistics for every metric and condition.")
+    parser.add_argument('--scores', default='datasets/scores_long.parquet',
+                        help="Long-format scores; falls back to the combined_* CSVs when missing")
+    parser.add_argument('--metrics', nargs='+', default=None)
+    parser.add_argument('--output-dir', default='datasets/report')
+    args = parser.parse_args()
+
+    report = build_report(load_store(args.scores), args.metrics)
+    for metric in report['summary']['metric'].unique():
+        print(f"=== {metric} ===")
+        print_metric(report, metric)
+    print(report['best'].to_string(index=False))
+    save_report(report, args.output_dir)
+    print(f"\nSaved {', '.join(report)} tables to: {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
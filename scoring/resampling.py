@@ -0,0 +1,96 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = 2000    # Resamples evaluated per matrix product; bounds memory at BLOCK_SIZE x n_titles
+
+
+def contrast_matrix(conditions: Sequence[Tuple[str, str]]) -> Tuple[np.ndarray, pd.DataFrame]:
+    # One row of weights over the condition columns per contrast: every pair of conditions, plus model
+    # and prompt main-effect contrasts that average over the other factor
+    rows, labels = [], []
+    conditions = list(conditions)
+
+    def add(kind, a, b, in_a, in_b):
+        weights = np.zeros(len(conditions))
+        weights[in_a] = 1.0 / len(in_a)
+        weights[in_b] = -1.0 / len(in_b)
+        rows.append(weights)
+        labels.append({'kind': kind, 'a': a, 'b': b})
+
+    for i, j in itertools.combinations(range(len(conditions)), 2):
+        add('condition', ' / '.join(conditions[i]), ' / '.join(conditions[j]), [i], [j])
+    for factor, kind in ((0, 'model'), (1, 'prompt')):
+        levels = list(dict.fromkeys(c[factor] for c in conditions))
+        for a, b in itertools.combinations(levels, 2):
+            add(kind, a, b, [k for k, c in enumerate(conditions) if c[factor] == a],
+                [k for k, c in enumerate(conditions) if c[factor] == b])
+    return np.array(rows), pd.DataFrame(labels)
+
+
+def _block(args) -> Tuple[np.ndarray, np.ndarray]:
+    # Both resampling schemes for one block, as weight matrices applied to all contrasts in one product:
+    # sign flips for the paired permutation test and multinomial counts for the bootstrap
+    diffs, size, seed = args
+    rng = np.random.default_rng(seed)
+    n = diffs.shape[0]
+
+    signs = rng.integers(0, 2, size=(size, n), dtype=np.int8) * 2 - 1
+    permuted = signs @ diffs / n
+
+    index = rng.integers(0, n, size=(size, n))
+    counts = np.bincount((index + np.arange(size)[:, None] * n).ravel(), minlength=size * n).reshape(size, n)
+    boot = counts @ diffs / n
+    return permuted, boot
+
+
+def resample(diffs: np.ndarray, n_resamples: int = 10000, seed: int = 0, block_size: int = BLOCK_SIZE,
+             workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    # Blocks get their own child seeds, so results do not depend on block scheduling or the worker count
+    sizes = [min(block_size, n_resamples - start) for start in range(0, n_resamples, block_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(diffs, size, s) for size, s in zip(sizes, seeds)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks = list(pool.map(_block, tasks))
+    else:
+        blocks = [_block(task) for task in tasks]
+    return np.concatenate([b[0] for b in blocks]), np.concatenate([b[1] for b in blocks])
+
+
+def significance_table(scores: np.ndarray, conditions: Sequence[Tuple[str, str]], n_resamples: int = 10000,
+                       confidence: float = 0.95, seed: int = 0, workers: int = 1) -> pd.DataFrame:
+    # scores is (titles x conditions); titles with a missing score in any condition are dropped
+    scores = np.asarray(scores, dtype=np.float64)
+    scores = scores[~np.isnan(scores).any(axis=1)]
+    weights, table = contrast_matrix(conditions)
+    diffs = scores @ weights.T
+    observed = diffs.mean(axis=0)
+
+    permuted, boot = resample(diffs, n_resamples, seed, workers=workers)
+    alpha = (1 - confidence) / 2
+    table['mean_diff'] = observed
+    table['ci_low'], table['ci_high'] = np.quantile(boot, [alpha, 1 - alpha], axis=0)
+    # Two-sided, counting the observed labelling as one of the permutations
+    extreme = (np.abs(permuted) >= np.abs(observed) - 1e-12).sum(axis=0)
+    table['p_value'] = (extreme + 1) / (n_resamples + 1)
+    table['n'] = len(scores)
+    return table
+
+
+def significance_long(long: pd.DataFrame, id_columns: List[str], n_resamples: int = 10000,
+                      confidence: float = 0.95, seed: int = 0, workers: int = 1,
+                      metric_column: Optional[str] = 'metric', model_column: str = 'model',
+                      prompt_column: str = 'prompt', score_column: str = 'score') -> pd.DataFrame:
+    # Long-format scores -> one significance table per metric, each pivoted to titles x conditions
+    groups = long.groupby(metric_column, sort=False) if metric_column else [('score', long)]
+    frames = []
+    for metric, group in groups:
+        wide = group.pivot_table(index=id_columns, columns=[model_column, prompt_column],
+                                 values=score_column, aggfunc='mean', observed=True)
+        table = significance_table(wide.to_numpy(), list(wide.columns), n_resamples, confidence, seed, workers)
+        frames.append(table.assign(metric=metric))
+    return pd.concat(frames, ignore_index=True)
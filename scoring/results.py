@@ -0,0 +1,120 @@
+import os
+import re
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .storage import SCORE_COLUMNS, read_scores, write_scores
+
+MODELS = {'gpt': 'GPT', 'gemini': 'Gemini', 'llama': 'Llama'}
+PROMPTS = {'culture aware': 'Culture-aware', 'title and synopsis': 'Title & Synopsis', 'title only': 'Title-only'}
+METRIC_PREFIXES = {'bleurt': 'bleurt', 'bertscore': 'bertscore_f1'}
+KEY = ['title_id', 'model', 'prompt', 'metric']
+
+# Wide combined_* tables written by the calc_* scripts, with the metric each one holds (None: per-column prefix)
+LEGACY_TABLES = {
+    'datasets/combined_similarity_scores.csv': 'cosine',
+    'datasets/combined_psr_scores.csv': 'psr',
+    'datasets/combined_BLEURT_BERTScore.csv': None,
+}
+
+Selector = Union[None, str, int, Iterable]
+
+
+def canonical_condition(name: str) -> Tuple[str, str]:
+    # 'datasets/gpt_Title_and_Synopsis.csv', 'Gemini_Title and Synopsis', 'BLEURT_Llama_Title-only', ...
+    # all normalize to lowercase words separated by single spaces before matching
+    words = os.path.basename(name).replace('.csv', '').replace('&', ' and ')
+    words = re.sub(r'[\s_\-]+', ' ', words).strip().lower()
+    model = next((MODELS[m] for m in MODELS if re.search(rf'\b{m}\b', words)), None)
+    prompt = next((PROMPTS[p] for p in PROMPTS if p in words), None)
+    if model is None or prompt is None:
+        raise ValueError(f"Cannot map '{name}' to a model and prompt condition")
+    return model, prompt
+
+
+class ResultsStore:
+    # Scores in long format, one row per (title_id, model, prompt, metric), indexed on those keys
+    def __init__(self, frame: pd.DataFrame):
+        frame = frame[SCORE_COLUMNS].assign(score=frame['score'].astype(np.float32))
+        for column in ('model', 'prompt', 'metric'):
+            frame[column] = frame[column].astype('category')
+        self.frame = frame.set_index(KEY, drop=False).sort_index()
+
+    @classmethod
+    def load(cls, path: str) -> 'ResultsStore':
+        return cls(read_scores(path))
+
+    def save(self, path: str, fmt: Optional[str] = None) -> str:
+        return write_scores(self.frame.reset_index(drop=True), path, fmt)
+
+    @classmethod
+    def from_wide(cls, df: pd.DataFrame, metric: Optional[str] = None) -> 'ResultsStore':
+        # Legacy combined_* tables: English and Chinese title first, then one score column per condition
+        # (prefixed with BLEURT_/BERTScore_ when one file holds several metrics)
+        titles = df.iloc[:, :2].astype(str)
+        title_id = titles.groupby(list(titles.columns), sort=False).ngroup().to_numpy()
+        frames = []
+        for column in df.columns[2:]:
+            prefix = column.split('_', 1)[0].lower()
+            column_metric = metric or METRIC_PREFIXES.get(prefix)
+            if column_metric is None:
+                raise ValueError(f"No metric given for column '{column}'")
+            model, prompt = canonical_condition(column)
+            frames.append(pd.DataFrame({
+                'title_id': title_id,
+                'english_title': titles.iloc[:, 0].to_numpy(),
+                'chinese_title': titles.iloc[:, 1].to_numpy(),
+                'model': model,
+                'prompt': prompt,
+                'metric': column_metric,
+                'score': pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float32),
+            }))
+        return cls(pd.concat(frames, ignore_index=True).dropna(subset=['score']))
+
+    @classmethod
+    def from_legacy(cls, tables: Optional[dict] = None) -> 'ResultsStore':
+        tables = LEGACY_TABLES if tables is None else tables
+        return cls.concat([cls.from_wide(pd.read_csv(path), metric) for path, metric in tables.items()
+                           if os.path.exists(path)])
+
+    @classmethod
+    def concat(cls, stores: List['ResultsStore']) -> 'ResultsStore':
+        return cls(pd.concat([s.frame.reset_index(drop=True) for s in stores], ignore_index=True))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self.frame['metric'].cat.categories)
+
+    @property
+    def models(self) -> List[str]:
+        return list(self.frame['model'].cat.categories)
+
+    @property
+    def prompts(self) -> List[str]:
+        return list(self.frame['prompt'].cat.categories)
+
+    def query(self, metric: Selector = None, model: Selector = None, prompt: Selector = None,
+              title_id: Selector = None) -> pd.DataFrame:
+        # Each selector is a value, a list of values or None for all; lookups go through the sorted key index
+        def level(value):
+            if value is None:
+                return slice(None)
+            return [value] if isinstance(value, (str, int, np.integer)) else list(value)
+
+        selection = (level(title_id), level(model), level(prompt), level(metric))
+        if all(isinstance(s, slice) for s in selection):
+            return self.frame.reset_index(drop=True)
+        return self.frame.loc[selection, :].reset_index(drop=True)
+
+    def scores(self, metric: str, model: Selector = None, prompt: Selector = None) -> np.ndarray:
+        return self.query(metric, model, prompt)['score'].to_numpy()
+
+    def wide(self, metric: str) -> pd.DataFrame:
+        # titles x (model, prompt) matrix for paired statistics
+        return self.query(metric).pivot_table(index='title_id', columns=['model', 'prompt'], values='score',
+                                              aggfunc='mean', observed=True)
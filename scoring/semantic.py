@@ -0,0 +1,132 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tracing import span
+
+from .inference import check_backend
+
+
+def unique_pairs(references: Sequence[str], predictions: Sequence[str]) -> Tuple[List[str], List[str], List[int]]:
+    # Drops duplicate (reference, prediction) pairs and sorts the rest by length, so similar-length
+    # pairs share a batch and padding stays small; rows maps every input pair back to its unique slot
+    pairs = list(zip(references, predictions))
+    unique = sorted(dict.fromkeys(pairs), key=lambda pair: len(pair[0]) + len(pair[1]))
+    position = {pair: i for i, pair in enumerate(unique)}
+    print(f"Scoring {len(unique)} unique pairs ({len(pairs) - len(unique)} duplicates skipped)")
+    return [ref for ref, _ in unique], [pred for _, pred in unique], [position[pair] for pair in pairs]
+
+
+def score_conditions(scorer, conditions: Dict[str, Tuple[List[str], List[str]]]) -> Dict[str, Dict[str, np.ndarray]]:
+    # All conditions go through one scoring pass, then the result arrays are split back per condition.
+    # scorer is anything with score_pairs(references, predictions): a SemanticScorer or a ScoringClient.
+    references, predictions, bounds = [], [], {}
+    for tag, (refs, preds) in conditions.items():
+        bounds[tag] = (len(references), len(references) + len(refs))
+        references.extend(refs)
+        predictions.extend(preds)
+
+    scores = scorer.score_pairs(references, predictions)
+    return {
+        tag: {metric: values[start:end] for metric, values in scores.items()}
+        for tag, (start, end) in bounds.items()
+    }
+
+
+class SemanticScorer:
+    # Loads BLEURT and BERTScore at most once (and only when used) and scores any number of pairs per call
+    def __init__(self, bleurt_checkpoint: str = "bleurt-20", bertscore_model: Optional[str] = None,
+                 lang: str = "en", batch_size: int = 64, num_threads: Optional[int] = None,
+                 device: Optional[str] = None, backend: str = 'fp32'):
+        import torch
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        # 'int8' models only run on CPU (see scoring.inference)
+        self.backend = backend
+        self.device = "cpu" if backend != 'fp32' else device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.batch_size = batch_size
+        self.num_threads = num_threads or torch.get_num_threads()
+        self.lang = lang
+        self.bleurt_checkpoint = bleurt_checkpoint
+        self.bertscore_model = bertscore_model
+        self._bleurt = None
+        self._bertscore = None
+        print(f"Using device: {self.device}")
+
+    @property
+    def bleurt(self):
+        if self._bleurt is None:
+            check_backend(self.backend, 'bleurt')
+            with span('model.load', 'model', model=f"bleurt:{self.bleurt_checkpoint}", backend=self.backend):
+                if self.backend == 'int8':
+                    from .inference import Int8Bleurt
+                    self._bleurt = Int8Bleurt(self.bleurt_checkpoint)
+                else:
+                    import evaluate
+                    self._bleurt = evaluate.load("bleurt", checkpoint=self.bleurt_checkpoint)
+        return self._bleurt
+
+    @property
+    def bertscore(self):
+        if self._bertscore is None:
+            check_backend(self.backend, 'bertscore')
+            with span('model.load', 'model', model='bertscore', backend=self.backend):
+                if self.backend == 'int8':
+                    from .inference import Int8BertScore
+                    self._bertscore = Int8BertScore()
+                else:
+                    import evaluate
+                    self._bertscore = evaluate.load("bertscore")
+        return self._bertscore
+
+    def _bleurt_batched(self, references: List[str], predictions: List[str]) -> np.ndarray:
+        # Call the underlying BleurtScorer directly when evaluate exposes it, so the batch size is ours
+        scorer = getattr(self.bleurt, 'scorer', None)
+        if scorer is not None:
+            with span('bleurt.score', 'cpu', pairs=len(references), device=self.device):
+                return np.array(scorer.score(references=references, candidates=predictions, batch_size=self.batch_size))
+        scores = []
+        for start in range(0, len(references), self.batch_size):
+            with span('bleurt.batch', 'cpu', start=start, device=self.device):
+                result = self.bleurt.compute(predictions=predictions[start:start + self.batch_size],
+                                             references=references[start:start + self.batch_size])
+            scores.extend(result["scores"])
+        return np.array(scores)
+
+    def _bertscore_batched(self, references: List[str], predictions: List[str]) -> Dict[str, np.ndarray]:
+        bert_kwargs = dict(
+            predictions=predictions,
+            references=references,
+            lang=self.lang,
+            device=self.device,
+            batch_size=self.batch_size,
+            nthreads=self.num_threads
+        )
+        if self.bertscore_model is not None:
+            bert_kwargs["model_type"] = self.bertscore_model
+        with span('bertscore.score', 'cpu', pairs=len(references), device=self.device):
+            result = self.bertscore.compute(**bert_kwargs)
+        return {key: np.array(result[key]) for key in ("precision", "recall", "f1")}
+
+    def bleurt_scores(self, references: Sequence[str], predictions: Sequence[str]) -> np.ndarray:
+        refs, preds, rows = unique_pairs(references, predictions)
+        return self._bleurt_batched(refs, preds)[rows]
+
+    def bertscore_scores(self, references: Sequence[str], predictions: Sequence[str]) -> Dict[str, np.ndarray]:
+        refs, preds, rows = unique_pairs(references, predictions)
+        return {key: values[rows] for key, values in self._bertscore_batched(refs, preds).items()}
+
+    def score_pairs(self, references: Sequence[str], predictions: Sequence[str]) -> Dict[str, np.ndarray]:
+        refs, preds, rows = unique_pairs(references, predictions)
+        bleurt = self._bleurt_batched(refs, preds)
+        bert = self._bertscore_batched(refs, preds)
+        return {
+            "BLEURT": bleurt[rows],
+            "BERTScore_P": bert["precision"][rows],
+            "BERTScore_R": bert["recall"][rows],
+            "BERTScore_F1": bert["f1"][rows],
+        }
+
+    def score_conditions(self, conditions: Dict[str, Tuple[List[str], List[str]]]) -> Dict[str, Dict[str, np.ndarray]]:
+        return score_conditions(self, conditions)
@@ -0,0 +1,316 @@
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tracing import span
+
+# 'host:port' listens on TCP (loopback only by default), anything else is a Unix socket path
+DEFAULT_ADDRESS = '127.0.0.1:8765'
+MAX_BATCH_PAIRS = 4096     # A micro-batch closes once it holds this many pairs...
+MAX_WAIT_MS = 10           # ...or this long after its first request arrived
+PING_TIMEOUT = 5.0         # Seconds ScoringClient.connect waits for a ping before falling back
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+class _Request:
+    __slots__ = ('metric', 'options', 'references', 'predictions', 'chinese_titles', 'future')
+
+    def __init__(self, metric: str, options: Dict[str, Any], references: List[str], predictions: List[str],
+                 chinese_titles: Optional[List[str]]):
+        self.metric, self.options = metric, options
+        self.references, self.predictions = references, predictions
+        self.chinese_titles = chinese_titles or [''] * len(references)
+        self.future = Future()
+
+    @property
+    def key(self) -> str:
+        return self.metric + json.dumps(self.options, sort_keys=True)
+
+
+class MicroBatcher:
+    # One scoring thread for all clients: requests that arrive within MAX_WAIT_MS of each other are merged per
+    # (metric, options) into one table and scored in one call, so models run on full batches and never concurrently
+    def __init__(self, max_batch_pairs: int = MAX_BATCH_PAIRS, max_wait_ms: float = MAX_WAIT_MS):
+        self.max_batch_pairs = max_batch_pairs
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue: 'queue.Queue[_Request]' = queue.Queue()
+        self.stats = {'requests': 0, 'batches': 0, 'pairs': 0, 'seconds': 0.0}
+        self.thread = threading.Thread(target=self._loop, name='scoring-batcher', daemon=True)
+        self.thread.start()
+
+    def submit(self, metric: str, references: List[str], predictions: List[str],
+               chinese_titles: Optional[List[str]] = None, options: Optional[Dict[str, Any]] = None) -> Future:
+        from .metrics import METRICS
+
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {sorted(METRICS)}")
+        if len(references) != len(predictions):
+            raise ValueError("references and predictions must have the same length")
+        if chinese_titles is not None and len(chinese_titles) != len(references):
+            raise ValueError("chinese_titles and references must have the same length")
+        request = _Request(metric, options or {}, list(references), list(predictions), chinese_titles)
+        self.queue.put(request)
+        return request.future
+
+    def _collect(self) -> List[_Request]:
+        batch = [self.queue.get()]
+        pairs = len(batch[0].references)
+        deadline = time.monotonic() + self.max_wait
+        while pairs < self.max_batch_pairs:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            pairs += len(request.references)
+        return batch
+
+    def _loop(self):
+        while True:
+            groups: Dict[str, List[_Request]] = {}
+            for request in self._collect():
+                groups.setdefault(request.key, []).append(request)
+            for requests in groups.values():
+                try:
+                    self._run(requests)
+                except Exception as e:
+                    # Any failure goes back to the batch's clients; the thread itself must outlive it
+                    for request in requests:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+
+    def _run(self, requests: List[_Request]):
+        import pandas as pd
+        from .metrics import METRICS
+
+        first = requests[0]
+        table = pd.DataFrame({
+            'reference': [t for r in requests for t in r.references],
+            'prediction': [t for r in requests for t in r.predictions],
+            'chinese_title': [t for r in requests for t in r.chinese_titles],
+        })
+        start = time.perf_counter()
+        with span('server.batch', 'cpu', metric=first.metric, requests=len(requests), pairs=len(table)):
+            scores = {name: np.asarray(values, dtype=np.float64)
+                      for name, values in METRICS[first.metric](table, **first.options).items()}
+        self.stats['requests'] += len(requests)
+        self.stats['batches'] += 1
+        self.stats['pairs'] += len(table)
+        self.stats['seconds'] += time.perf_counter() - start
+
+        offset = 0
+        for request in requests:
+            end = offset + len(request.references)
+            request.future.set_result({name: values[offset:end].tolist() for name, values in scores.items()})
+            offset = end
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer if hasattr(socket, 'AF_UNIX') else object):
+    daemon_threads = True
+
+
+class ScoringServer:
+    # Resident scorer: models load once (on first use or with preload) and stay warm across clients and requests.
+    # Wire format is one JSON object per line each way over a persistent connection:
+    #   {"op": "score", "metric": "bleurt", "references": [...], "predictions": [...], "options": {...}}
+    #   -> {"ok": true, "scores": {"bleurt": [...]}}  or  {"ok": false, "error": "..."}
+    def __init__(self, address: str = DEFAULT_ADDRESS, max_batch_pairs: int = MAX_BATCH_PAIRS,
+                 max_wait_ms: float = MAX_WAIT_MS, **options):
+        self.address = address
+        # Server-side defaults under every request's own options (e.g. num_threads), so preloaded models are reused
+        self.options = options
+        self.batcher = MicroBatcher(max_batch_pairs, max_wait_ms)
+        self.started = time.time()
+        family, bind = parse_address(address)
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        response = server.handle(json.loads(line))
+                    except Exception as e:
+                        response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                    self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                    self.wfile.flush()
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(bind):
+                os.remove(bind)
+            self.server = _UnixServer(bind, Handler)
+        else:
+            self.server = _TCPServer(bind, Handler)
+            self.address = '%s:%d' % self.server.server_address[:2]    # Port 0 picks a free port
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        op = message.get('op', 'score')
+        if op == 'ping':
+            return {'ok': True, 'pid': os.getpid(), 'uptime': time.time() - self.started}
+        if op == 'stats':
+            return {'ok': True, 'stats': dict(self.batcher.stats)}
+        if op == 'shutdown':
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {'ok': True}
+        if op != 'score':
+            return {'ok': False, 'error': f"Unknown op '{op}'"}
+        future = self.batcher.submit(message['metric'], message['references'], message['predictions'],
+                                     message.get('chinese_titles'), dict(self.options, **message.get('options', {})))
+        return {'ok': True, 'scores': future.result()}
+
+    def preload(self, metrics: Sequence[str]):
+        # Scores one pair per metric so every model is in memory before the first real request
+        for metric in metrics:
+            start = time.perf_counter()
+            self.batcher.submit(metric, ['warm up'], ['warm up'], options=self.options).result()
+            print(f"Loaded {metric} in {time.perf_counter() - start:.1f}s")
+
+    def serve_forever(self):
+        print(f"Scoring server listening on {self.address}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            family, bind = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(bind):
+                os.remove(bind)
+
+
+class ScoringClient:
+    # Client for a running ScoringServer. options are sent with every request, so they must match on the server
+    # side for requests from different clients to share a batch (and a loaded model).
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: Optional[float] = None, **options):
+        self.address = address
+        # Unset options are left out so the server's own defaults apply
+        self.options = {key: value for key, value in options.items() if value is not None}
+        family, target = parse_address(address)
+        self.timeout = timeout
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(target)
+        except OSError:
+            self.sock.close()
+            raise
+        self.reader = self.sock.makefile('rb')
+        self.lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, address: Optional[str] = DEFAULT_ADDRESS, **options) -> Optional['ScoringClient']:
+        # None when no scoring server answers there (nothing listening, some other service, a broken reply),
+        # so scripts can fall back to loading the models themselves
+        if not address:
+            return None
+        try:
+            client = cls(address, **options)
+        except OSError:
+            return None
+        try:
+            client.sock.settimeout(PING_TIMEOUT)
+            client.ping()
+            client.sock.settimeout(client.timeout)
+            return client
+        except (OSError, ValueError, RuntimeError):
+            client.close()
+            return None
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self) -> 'ScoringClient':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _call(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            self.sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            line = self.reader.readline()
+        if not line:
+            raise ConnectionError(f"Scoring server at {self.address} closed the connection")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(f"Scoring server error: {response.get('error')}")
+        return response
+
+    def ping(self) -> Dict[str, Any]:
+        return self._call({'op': 'ping'})
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call({'op': 'stats'})['stats']
+
+    def shutdown(self):
+        self._call({'op': 'shutdown'})
+
+    def score(self, metric: str, references: Sequence[str], predictions: Sequence[str],
+              chinese_titles: Optional[Sequence[str]] = None, **options) -> Dict[str, np.ndarray]:
+        message = {'op': 'score', 'metric': metric, 'references': list(references),
+                   'predictions': list(predictions), 'options': dict(self.options, **options)}
+        if chinese_titles is not None:
+            message['chinese_titles'] = list(chinese_titles)
+        scores = self._call(message)['scores']
+        return {name: np.asarray(values) for name, values in scores.items()}
+
+    # Same interface as SemanticScorer, so the BLEURT/BERTScore scripts can use either
+    def score_pairs(self, references: Sequence[str], predictions: Sequence[str]) -> Dict[str, np.ndarray]:
+        bleurt = self.score('bleurt', references, predictions)
+        bert = self.score('bertscore', references, predictions)
+        return {
+            "BLEURT": bleurt['bleurt'],
+            "BERTScore_P": bert['bertscore_p'],
+            "BERTScore_R": bert['bertscore_r'],
+            "BERTScore_F1": bert['bertscore_f1'],
+        }
+
+    def score_conditions(self, conditions: Dict[str, Tuple[List[str], List[str]]]) -> Dict[str, Dict[str, np.ndarray]]:
+        from .semantic import score_conditions
+        return score_conditions(self, conditions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the metric models loaded and score batched requests "
+                                                 "from local clients.")
+    parser.add_argument('--address', default=DEFAULT_ADDRESS, help="host:port, or a Unix socket path")
+    parser.add_argument('--preload', nargs='*', default=[], help="Metrics to load before accepting requests")
+    parser.add_argument('--max-batch-pairs', type=int, default=MAX_BATCH_PAIRS)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    parser.add_argument('--num-threads', type=int, default=None)
+    args = parser.parse_args()
+
+    options = {'num_threads': args.num_threads} if args.num_threads else {}
+    server = ScoringServer(args.address, args.max_batch_pairs, args.max_wait_ms, **options)
+    server.preload(args.preload)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
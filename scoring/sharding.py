@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .metrics import ID_COLUMNS, METRIC_OUTPUTS, METRICS
+
+_worker_options: Dict[str, Any] = {}
+
+
+def _init_worker(options: Dict[str, Any]):
+    # Models are cached per process by the metric plugins, so each worker loads them once for all its shards
+    _worker_options.update(options)
+
+
+def _score_shard(args: Tuple[str, Tuple[int, int], List[str], int, pd.DataFrame]) -> int:
+    shm_name, shape, names, start, shard = args
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        results = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        column = 0
+        for name in names:
+            scores = METRICS[name](shard, **_worker_options)
+            for output in METRIC_OUTPUTS[name]:
+                results[column, start:start + len(shard)] = np.asarray(scores[output], dtype=np.float32)
+                column += 1
+        del results
+    finally:
+        shm.close()
+    return len(shard)
+
+
+def shard_bounds(n_rows: int, n_shards: int) -> List[Tuple[int, int]]:
+    bounds = np.linspace(0, n_rows, min(n_shards, max(n_rows, 1)) + 1).astype(int)
+    return [(int(s), int(e)) for s, e in zip(bounds[:-1], bounds[1:]) if e > s]
+
+
+def run_sharded(table: pd.DataFrame, names: List[str], workers: int = os.cpu_count() or 1,
+                shards_per_worker: int = 1, **options) -> pd.DataFrame:
+    # Same output as run_metrics, but row shards of the condition table are scored in parallel processes that
+    # write straight into one shared (output column x row) float32 array
+    outputs = [output for name in names for output in METRIC_OUTPUTS[name]]
+    shape = (len(outputs), len(table))
+    bounds = shard_bounds(len(table), workers * shards_per_worker)
+
+    # Split the cores between workers instead of letting every worker's torch claim all of them
+    options = dict(options, num_threads=options.get('num_threads') or max(1, (os.cpu_count() or 1) // workers),
+                   psr_workers=1)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 4, 1))
+    try:
+        print(f"Scoring {len(table)} rows in {len(bounds)} shards on {workers} workers: {', '.join(names)}")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as pool:
+            shards = [(shm.name, shape, names, start, table.iloc[start:end]) for start, end in bounds]
+            done = 0
+            for count in pool.map(_score_shard, shards):
+                done += count
+                print(f"Scored {done}/{len(table)} rows")
+        results = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return pd.concat([table[ID_COLUMNS].assign(metric=output, score=results[i]) for i, output in enumerate(outputs)],
+                     ignore_index=True)
@@ -0,0 +1,80 @@
+import os
+import shutil
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from tracing import span
+
+from .metrics import ID_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+PARTITION_COLUMNS = ['model', 'prompt']
+FORMATS = ('parquet', 'csv')
+SCORE_COLUMNS = ID_COLUMNS + ['metric', 'score']
+
+
+def default_format() -> str:
+    return 'parquet' if pa is not None else 'csv'
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet storage needs pyarrow (pip install pyarrow); use format='csv' instead")
+
+
+def write_scores(frame: pd.DataFrame, path: str, fmt: Optional[str] = None,
+                 partition_columns: Sequence[str] = PARTITION_COLUMNS) -> str:
+    # Long-format scores as a hive-partitioned Parquet dataset (model=.../prompt=.../*.parquet) with a float32
+    # score column, or as one UTF-8-BOM CSV like the rest of datasets/
+    fmt = fmt or default_format()
+    frame = frame.assign(score=frame['score'].astype(np.float32))
+    if fmt == 'csv':
+        with span('scores.write', 'io', format=fmt, rows=len(frame)):
+            frame.to_csv(path, index=False, encoding='utf-8-sig')
+        return path
+
+    _require_pyarrow()
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    partitioning = ds.partitioning(pa.schema([table.schema.field(c) for c in partition_columns]), flavor='hive')
+    # Written aside and swapped in, so readers never see a half-written dataset or stale partitions
+    tmp = path + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    with span('scores.write', 'io', format=fmt, rows=len(frame)):
+        ds.write_dataset(table, tmp, format='parquet', partitioning=partitioning)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+    return path
+
+
+def read_scores(path: str, columns: Optional[List[str]] = None, filters=None) -> pd.DataFrame:
+    # Only the requested columns (and matching partitions) of a Parquet dataset are read;
+    # filters is a pyarrow expression, e.g. ds.field('metric') == 'psr'
+    if not os.path.isdir(path):
+        # Titles stay verbatim (a film called "NA" is not missing), but an empty score is a NaN score
+        with span('scores.read', 'io', format='csv'):
+            frame = pd.read_csv(path, encoding='utf-8-sig', keep_default_na=False, na_values={'score': ['']},
+                                dtype={'english_title': str, 'chinese_title': str, 'model': str, 'prompt': str,
+                                       'metric': str, 'score': np.float32})
+        return frame[columns] if columns else frame
+
+    _require_pyarrow()
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    with span('scores.read', 'io', format='parquet'):
+        frame = dataset.to_table(columns=columns, filter=filters).to_pandas()
+    # Partition keys come back as dictionary columns; hand them out as plain strings like the CSV path
+    for column in PARTITION_COLUMNS:
+        if column in frame:
+            frame[column] = frame[column].astype(str)
+    return frame if columns else frame[SCORE_COLUMNS]
+
+
+def scores_exist(path: str) -> bool:
+    return os.path.isdir(path) or os.path.isfile(path)
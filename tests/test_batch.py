@@ -0,0 +1,138 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.mock_llm_server import MockConfig, MockLLMServer
+from generation import batch
+from generation.cache import ResponseCache
+from generation.dispatch import MISSING_OVERVIEW, build_jobs
+from generation.prompts import PROMPTS
+from generation.providers import AzureProvider, OpenAICompatibleProvider
+
+ROWS = [
+    {'English Title': 'Hero', 'Chinese Title': '英雄', 'Overview': '战国时期，无名刺客面见秦王。'},
+    {'English Title': 'Farewell My Concubine', 'Chinese Title': '霸王别姬', 'Overview': ''},
+    {'English Title': 'The Wandering Earth', 'Chinese Title': '流浪地球', 'Overview': '太阳即将毁灭，人类带着地球逃离。'},
+    {'English Title': 'Let the Bullets Fly', 'Chinese Title': '让子弹飞', 'Overview': '麻匪张牧之冒充县长来到鹅城。'},
+]
+
+
+@pytest.fixture
+def server(tmp_path):
+    config = MockConfig(latency='fixed', latency_median=0.0, error_429_rate=0.0, echo=True,
+                        batch_error_rate=0.3, seed=1)
+    with MockLLMServer(config, batch_dir=str(tmp_path / 'server')) as server:
+        yield server
+
+
+def provider_for(server, name='groq'):
+    if name == 'azure':
+        return AzureProvider('gpt-5-chat', 'mock-key', endpoint=server.url)
+    return OpenAICompatibleProvider('llama-3.1-8b-instant', 'mock-key', base_url=server.url)
+
+
+def responses_by_job(results, structured=False):
+    # Result rows come back per prompt in job order; pair each with the job it answers
+    jobs = build_jobs(ROWS, PROMPTS, structured)
+    rows = {p_num: iter(rows) for p_num, rows in results.items()}
+    return [(job, next(rows[job['p_num']])['Prompt_Response']) for job in jobs]
+
+
+@pytest.mark.parametrize('name', ['groq', 'azure'])
+def test_results_map_back_by_custom_id(server, tmp_path, name):
+    results = batch.run_batch(provider_for(server, name), ROWS, PROMPTS, str(tmp_path / 'out'),
+                              cache_file=None, poll_interval=0)
+
+    answered, failed = 0, 0
+    for job, response in responses_by_job(results):
+        if job['user_query'] is None:
+            assert response == MISSING_OVERVIEW
+        elif response.startswith("ERROR: Batch request failed"):
+            assert 'Mock batch line failed' in response
+            failed += 1
+        else:
+            # The mock shuffles its output file, so a match here means the custom_id mapping is right
+            assert response == f"Mock English Title for {job['user_query']}"
+            answered += 1
+    assert answered and failed
+    assert server.stats.batches == 1
+    assert not os.path.exists(tmp_path / 'out' / f"{provider_for(server, name).output_prefix}_batch_state.json")
+
+
+def test_rows_without_overview_are_not_uploaded(server, tmp_path):
+    provider = provider_for(server)
+    jobs = build_jobs(ROWS, PROMPTS)
+    count = batch.compile_batch(provider, jobs, str(tmp_path / 'input.jsonl'))
+
+    assert count == sum(job['user_query'] is not None for job in jobs) == len(jobs) - 2
+    with open(tmp_path / 'input.jsonl', encoding='utf-8') as f:
+        ids = [json.loads(line)['custom_id'] for line in f]
+    assert len(set(ids)) == count
+    assert 'prompt2-row1' not in ids and 'prompt1-row1' in ids
+
+
+def test_rerun_resumes_the_submitted_batch(server, tmp_path, monkeypatch):
+    provider = provider_for(server)
+    output_dir = str(tmp_path / 'out')
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+    with monkeypatch.context() as patch:
+        patch.setattr(batch, 'wait_for_batch', interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            batch.run_batch(provider, ROWS, PROMPTS, output_dir, cache_file=None, poll_interval=0)
+    state_path = os.path.join(output_dir, f"{provider.output_prefix}_batch_state.json")
+    with open(state_path, encoding='utf-8') as f:
+        submitted = json.load(f)['batch_id']
+
+    polled = []
+    wait = batch.wait_for_batch
+    monkeypatch.setattr(batch, 'wait_for_batch', lambda p, batch_id, i: polled.append(batch_id) or wait(p, batch_id, i))
+    batch.run_batch(provider, ROWS, PROMPTS, output_dir, cache_file=None, poll_interval=0)
+
+    assert polled == [submitted]
+    assert server.stats.batches == 1
+    assert not os.path.exists(state_path)
+
+
+def test_changed_input_resubmits(server, tmp_path, monkeypatch):
+    provider = provider_for(server)
+    output_dir = str(tmp_path / 'out')
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+    with monkeypatch.context() as patch:
+        patch.setattr(batch, 'wait_for_batch', interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            batch.run_batch(provider, ROWS, PROMPTS, output_dir, cache_file=None, poll_interval=0)
+
+    # Structured mode changes the Culture-aware prompt text, so the old batch no longer answers these jobs
+    results = batch.run_batch(provider, ROWS, PROMPTS, output_dir, cache_file=None, poll_interval=0, structured=True)
+
+    assert server.stats.batches == 2
+    for job, response in responses_by_job(results, structured=True):
+        if job['user_query'] is not None and not response.startswith("ERROR"):
+            assert response == f"Mock English Title for {job['user_query']}"
+
+
+def test_cached_responses_are_not_uploaded_again(server, tmp_path):
+    provider = provider_for(server)
+    cache_file = str(tmp_path / 'cache.sqlite')
+    first = responses_by_job(batch.run_batch(provider, ROWS, PROMPTS, str(tmp_path / 'out'),
+                                             cache_file=cache_file, poll_interval=0))
+    failed = [job for job, response in first if job['user_query'] is not None and response.startswith("ERROR")]
+
+    results = batch.run_batch(provider, ROWS, PROMPTS, str(tmp_path / 'out'), cache_file=cache_file, poll_interval=0)
+
+    # Only the lines that failed the first time go into the second batch
+    assert server.stats.batches == 2
+    with open(tmp_path / 'out' / f"{provider.output_prefix}_batch_input.jsonl", encoding='utf-8') as f:
+        assert sum(1 for _ in f) == len(failed)
+    cache = ResponseCache(cache_file)
+    for (job, before), (_, after) in zip(first, responses_by_job(results)):
+        if job['user_query'] is not None and not before.startswith("ERROR"):
+            assert after == before
+            key = ResponseCache.make_key(provider.name, provider.model, job['template'], job['user_query'])
+            assert cache.get(key) == before
+    cache.close()
@@ -0,0 +1,92 @@
+import asyncio
+import contextlib
+import io
+import re
+import threading
+import time
+
+from benchmarks.mock_llm_server import MockConfig, MockLLMServer
+from generation.dispatch import MISSING_OVERVIEW, build_jobs, process_data
+from generation.parsing import is_error
+from generation.prompts import PROMPTS
+from generation.providers import OpenAICompatibleProvider
+from generation.runner import run_async
+
+ROWS = [{'English Title': f'Title {i}', 'Chinese Title': f'片名{i}', 'Overview': f'剧情简介{i}' if i % 5 else ''}
+        for i in range(12)]
+
+
+def mock_provider(server, max_in_flight):
+    provider = OpenAICompatibleProvider('llama-3.1-8b-instant', 'mock-key', base_url=server.url,
+                                        requests_per_minute=100000, max_in_flight=max_in_flight)
+    # Short client backoff so injected 429s cost the test milliseconds
+    provider.limiter.base_backoff, provider.limiter.max_backoff = 0.01, 0.05
+    return provider
+
+
+def test_order_is_kept_and_in_flight_is_bounded():
+    config = MockConfig(latency='uniform', latency_median=0.02, error_429_rate=0.2, retry_after=0.01, echo=True, seed=0)
+    max_in_flight = 4
+    with MockLLMServer(config) as server:
+        provider = mock_provider(server, max_in_flight)
+        finished = []
+
+        def call_api(user_query, **kwargs):
+            # The first title of every group of four answers last, so completion order never matches job order
+            if re.search(r'片名[048](?!\d)', user_query):
+                time.sleep(0.2)
+            response = provider.call(user_query, **kwargs)
+            finished.append(user_query)
+            return response
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = process_data(ROWS, PROMPTS, call_api, max_in_flight, provider=provider.name)
+        stats = server.stats
+
+    jobs = build_jobs(ROWS, PROMPTS)
+    queries = [job['user_query'] for job in jobs if job['user_query'] is not None]
+    assert finished != queries and sorted(finished) == sorted(queries)
+
+    for p_num, rows in results.items():
+        p_jobs = [job for job in jobs if job['p_num'] == p_num]
+        assert [row['Chinese Title'] for row in rows] == [job['result_row']['Chinese Title'] for job in p_jobs]
+        for row, job in zip(rows, p_jobs):
+            if job['user_query'] is None:
+                assert row['Prompt_Response'] == MISSING_OVERVIEW
+            else:
+                assert row['Prompt_Response'] == f"Mock English Title for {job['user_query']}"
+
+    assert stats.rate_limited > 0
+    assert 2 <= stats.peak_in_flight <= max_in_flight
+
+
+def test_a_failing_provider_does_not_stall_the_others(tmp_path):
+    healthy_config = MockConfig(latency='fixed', latency_median=0.01, error_429_rate=0.0, echo=True)
+    # Every request is rate limited, so each job spends its whole retry budget waiting
+    failing_config = MockConfig(latency='fixed', latency_median=0.0, error_429_rate=1.0, retry_after=0.05)
+    with MockLLMServer(healthy_config) as healthy_server, MockLLMServer(failing_config) as failing_server:
+        healthy, failing = mock_provider(healthy_server, 4), mock_provider(failing_server, 4)
+        failing.name = 'failing'
+        done = {}
+        lock = threading.Lock()
+
+        def timed(provider):
+            call = provider.call
+
+            def wrapper(user_query, **kwargs):
+                response = call(user_query, **kwargs)
+                with lock:
+                    done.setdefault(provider.name, []).append(time.monotonic())
+                return response
+            return wrapper
+        healthy.call, failing.call = timed(healthy), timed(failing)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = asyncio.run(run_async([healthy, failing], ROWS, PROMPTS, str(tmp_path)))
+
+    # Every healthy request finished before the first failing one gave up
+    assert max(done['groq']) < min(done['failing'])
+    for provider, expect_error in (('groq', False), ('failing', True)):
+        responses = [row['Prompt_Response'] for rows in results[provider].values() for row in rows
+                     if row['Prompt_Response'] != MISSING_OVERVIEW]
+        assert responses and all(is_error(response) == expect_error for response in responses)
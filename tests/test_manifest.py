@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from scoring.manifest import ScoreManifest, run_incremental
+from scoring.metrics import ID_COLUMNS, METRIC_OUTPUTS, METRICS, register_metric
+
+
+@register_metric('length_a')
+def length_a(table, **options):
+    return {'length_a': table['prediction'].str.len().to_numpy()}
+
+
+@register_metric('length_b', outputs=['length_b_ref', 'length_b_pred'])
+def length_b(table, **options):
+    return {'length_b_ref': table['reference'].str.len().to_numpy(),
+            'length_b_pred': table['prediction'].str.len().to_numpy()}
+
+
+def make_table(predictions):
+    n = len(predictions)
+    return pd.DataFrame({
+        'title_id': np.arange(n) % 3,
+        'english_title': [f"title {i % 3}" for i in range(n)],
+        'chinese_title': [f"标题 {i % 3}" for i in range(n)],
+        'model': ['GPT'] * n,
+        'prompt': ['Title-only'] * n,
+        'reference': [f"reference {i % 3}" for i in range(n)],
+        'prediction': predictions,
+    })
+
+
+def counting_run(calls):
+    def run(rows, names, **options):
+        calls.append((tuple(names), len(rows)))
+        frames = [rows[ID_COLUMNS].assign(metric=metric, score=np.asarray(scores, dtype=np.float32))
+                  for name in names for metric, scores in METRICS[name](rows, **options).items()]
+        return pd.concat(frames, ignore_index=True)
+    return run
+
+
+def first_run(tmp_path, table, names):
+    source = tmp_path / 'condition.csv'
+    source.write_text('unchanged', encoding='utf-8')
+    manifest = ScoreManifest(str(tmp_path / 'scores.manifest.json'))
+    results = counting_run([])(table, names)
+    manifest.record(table, [str(source)], names, {})
+    manifest.save()
+    return [str(source)], results
+
+
+def test_unchanged_inputs_rescore_nothing_for_every_metric(tmp_path):
+    table = make_table(['a', 'bb', 'ccc', 'a', 'bb', 'ccc'])
+    names = ['length_a', 'length_b']
+    paths, previous = first_run(tmp_path, table, names)
+
+    calls = []
+    manifest = ScoreManifest(str(tmp_path / 'scores.manifest.json'))
+    results = run_incremental(table, names, paths, previous, manifest, counting_run(calls))
+
+    assert calls == []
+    pd.testing.assert_frame_equal(results.reset_index(drop=True), previous.reset_index(drop=True))
+
+
+def test_changed_rows_are_rescored_and_other_metrics_carried_over(tmp_path):
+    table = make_table(['a', 'bb', 'ccc'])
+    paths, previous = first_run(tmp_path, table, ['length_a', 'length_b'])
+
+    edited = make_table(['a', 'bbbb', 'ccc'])
+    calls = []
+    manifest = ScoreManifest(str(tmp_path / 'scores.manifest.json'))
+    results = run_incremental(edited, ['length_a'], paths, previous, manifest, counting_run(calls))
+
+    assert calls == [(('length_a',), 1)]
+    assert results.loc[results['metric'] == 'length_a', 'score'].tolist() == [1, 4, 3]
+    # length_b was not requested: unchanged rows are kept, the edited row is dropped so it is rescored later
+    assert results.loc[results['metric'] == 'length_b_pred', 'score'].tolist() == [1, 3]
+    assert set(manifest.metrics) == {'length_a', 'length_b'}
+    assert set(results['metric']) == {'length_a'} | set(METRIC_OUTPUTS['length_b'])
@@ -0,0 +1,83 @@
+import csv
+import json
+import os
+
+import pytest
+
+from generation.parsing import is_error, parse_response
+
+DATASETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'datasets')
+
+
+def culture_aware_rows(file_name, n=5):
+    # (title, reason) pairs the published runs extracted from real Culture-aware responses
+    with open(os.path.join(DATASETS, file_name), 'r', newline='', encoding='utf-8-sig') as f:
+        rows = [(row[3], row[4]) for row in list(csv.reader(f))[1:] if row[3].strip() and row[4].strip()]
+    model = file_name.split('_')[0]
+    return [pytest.param(title, reason, id=f"{model}-{i}") for i, (title, reason) in enumerate(rows[:n])]
+
+
+GPT = culture_aware_rows('gpt_Culture-aware.csv')          # Titles wrapped in *italics*
+GEMINI = culture_aware_rows('Gemini_Culture-aware.csv')
+LLAMA = culture_aware_rows('Llama_Culture-aware.csv')
+
+
+def flat(text):
+    return ' '.join(text.split())
+
+
+def expected(title, reason):
+    # Markdown emphasis and quotes around the title are not part of it
+    return {'Extracted_English_Title': title.strip('*"“” '), 'Translation_Reason': flat(reason)}
+
+
+LAYOUTS = {
+    'italic_first_line': lambda t, r: f"{t}\n\n{r}",
+    'labelled': lambda t, r: f"英文译名：{t}\n翻译理由：{r}",
+    'labelled_markdown': lambda t, r: f"**英文片名：** {t}\n\n**理由：** {r}",
+    'labelled_english': lambda t, r: f"English Title: {t}\nReason: {r}",
+    'json': lambda t, r: json.dumps({'英文片名': t, '理由': r}, ensure_ascii=False),
+    'json_fenced': lambda t, r: "```json\n" + json.dumps({'英文片名': t, '理由': r}, ensure_ascii=False, indent=2) + "\n```",
+    'json_with_preamble': lambda t, r: "Here is the result:\n" + json.dumps({'english_title': t, 'reason': r}),
+}
+
+
+@pytest.mark.parametrize('layout', sorted(LAYOUTS))
+@pytest.mark.parametrize('title, reason', GPT + GEMINI + LLAMA)
+def test_real_responses(layout, title, reason):
+    assert parse_response(LAYOUTS[layout](title, reason)) == expected(title, reason)
+
+
+def test_italic_titles_are_unwrapped():
+    titles = [param.values for param in GPT]
+    assert titles and all(title.startswith('*') for title, _ in titles)
+    for title, reason in titles:
+        assert not parse_response(f"{title}\n{reason}")['Extracted_English_Title'].startswith('*')
+
+
+@pytest.mark.parametrize('text, title, reason', [
+    ('', 'N/A', ''),
+    ('   ', 'N/A', '   '),
+    ('\n\t\n', 'N/A', '\n\t\n'),
+    ('ERROR: Failed to get response after multiple retries.', 'N/A',
+     'ERROR: Failed to get response after multiple retries.'),
+    ('ERROR: Skipping query for missing Overview data.', 'N/A', 'ERROR: Skipping query for missing Overview data.'),
+    # A real answer that mentions the word is not a failure
+    ('Fatal ERROR\n片名直译，保留了 ERROR 一词。', 'Fatal ERROR', '片名直译，保留了 ERROR 一词。'),
+    ('Hero', 'Hero', ''),
+    ('{"英文片名": "Hero"}', 'Hero', ''),
+    ('{"unrelated": 1}\nHero', '{"unrelated": 1}', 'Hero'),
+])
+def test_edge_cases(text, title, reason):
+    assert parse_response(text) == {'Extracted_English_Title': title, 'Translation_Reason': reason}
+
+
+@pytest.mark.parametrize('text, failed', [
+    ('ERROR: Batch request failed: {}', True),
+    ('ERROR: Authentication/Request Failed (401).', True),
+    ('Fatal ERROR', False),
+    ('The ERROR: a title', False),
+    ('', False),
+])
+def test_is_error(text, failed):
+    assert is_error(text) is failed
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from scoring.conditions import CONDITIONS, load_conditions
+from scoring.psr import best_csi_terms, calculate_psr_for_row, psr_matrix, psr_scores
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def partial_ratio(backend):
+    if backend == 'rapidfuzz':
+        from rapidfuzz import fuzz
+    else:
+        from fuzzywuzzy import fuzz
+    return fuzz.partial_ratio
+
+
+def psr_for_row(reference, generated, csi_terms, backend):
+    # calculate_psr_for_row as published; rapidfuzz gets the same loop with its own partial_ratio
+    if backend == 'fuzzywuzzy':
+        return calculate_psr_for_row(reference, generated, csi_terms)
+    if not reference or not generated:
+        return 0.0
+    ratio = partial_ratio(backend)
+    return max([ratio(str(t).lower(), str(generated).lower()) / 100.0 for t in (csi_terms or [reference]) if t],
+               default=0.0)
+
+
+def assert_same(actual, expected, backend):
+    # fuzzywuzzy ratios are whole percents, so its scores must match to the bit; rapidfuzz ratios are floats
+    # that the vectorized path divides in float32, so they may differ in the last float32 bit
+    if backend == 'fuzzywuzzy':
+        np.testing.assert_array_equal(actual, np.asarray(expected, dtype=np.float32))
+    else:
+        np.testing.assert_allclose(actual, np.asarray(expected, dtype=np.float32), rtol=0, atol=1e-6)
+
+
+@pytest.fixture(scope='module')
+def sample():
+    table = load_conditions([(os.path.join(ROOT, path), model, prompt) for path, model, prompt in CONDITIONS])
+    rows = table.sample(80, random_state=0)
+    references, predictions = rows['reference'].tolist(), rows['prediction'].tolist()
+    # Repeated predictions (the same title from several conditions), case variants and empty strings
+    references += references[:10] + ['', 'Hero']
+    predictions += predictions[:10] + ['Hero', '']
+    predictions[-3] = predictions[-3].upper()
+    # Glossary drawn from real reference titles, with exact and case-only duplicates and an empty term
+    terms = table['reference'].drop_duplicates().sample(25, random_state=1).tolist()
+    terms += terms[:5] + [t.upper() for t in terms[5:8]] + ['']
+    return references, predictions, terms
+
+
+@pytest.mark.parametrize('backend', ['fuzzywuzzy', 'rapidfuzz'])
+@pytest.mark.parametrize('with_terms', [True, False])
+def test_psr_scores_match_the_per_row_function(sample, backend, with_terms):
+    references, predictions, terms = sample
+    csi_terms = terms if with_terms else []
+    expected = [psr_for_row(r, p, csi_terms, backend) for r, p in zip(references, predictions)]
+    assert_same(psr_scores(references, predictions, csi_terms, backend=backend), expected, backend)
+
+
+@pytest.mark.parametrize('backend', ['fuzzywuzzy', 'rapidfuzz'])
+def test_best_csi_terms_index_the_original_terms(sample, backend):
+    _, predictions, terms = sample
+    terms = [t for t in terms if t]
+    ratio = partial_ratio(backend)
+    scores, best = best_csi_terms(predictions, terms, backend=backend)
+
+    matrix = psr_matrix(predictions, terms, backend=backend)
+    assert matrix.shape == (len(predictions), len(terms))
+    for i, prediction in enumerate(predictions):
+        row = [ratio(t.lower(), prediction.lower()) / 100.0 for t in terms]
+        assert_same(matrix[i], row, backend)
+        assert_same(scores[i:i + 1], [max(row)], backend)
+        # The first term reaching the best score, as the per-row loop keeps it
+        if backend == 'fuzzywuzzy':
+            assert best[i] == int(np.argmax(row))
+        else:
+            assert row[best[i]] == pytest.approx(max(row), abs=1e-6)
+
+
+def test_workers_do_not_change_scores(sample):
+    references, predictions, terms = sample
+    serial = psr_scores(references, predictions, terms)
+    np.testing.assert_array_equal(psr_scores(references, predictions, terms, workers=2), serial)
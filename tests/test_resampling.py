@@ -0,0 +1,96 @@
+import itertools
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from scoring.resampling import contrast_matrix, significance_table
+
+CONDITIONS = [('A', 'x'), ('A', 'y'), ('B', 'x'), ('B', 'y')]
+
+
+def paired_scores(n, shift, seed):
+    rng = np.random.default_rng(seed)
+    a = rng.normal(0.5, 0.1, size=n)
+    return np.column_stack([a, a + shift + rng.normal(0, 0.05, size=n)])
+
+
+def test_contrast_matrix():
+    weights, labels = contrast_matrix(CONDITIONS)
+    assert len(labels) == 6 + 1 + 1
+    np.testing.assert_allclose(weights.sum(axis=1), 0)
+    model = labels.index[labels['kind'] == 'model'][0]
+    np.testing.assert_allclose(weights[model], [0.5, 0.5, -0.5, -0.5])
+
+
+def test_permutation_p_value_matches_exact_enumeration():
+    scores = paired_scores(12, 0.02, seed=3)
+    diffs = scores[:, 0] - scores[:, 1]
+    observed = abs(diffs.mean())
+
+    # Every one of the 2^12 sign assignments, which is what the sign-flip test samples from
+    flips = np.array(list(itertools.product([1, -1], repeat=len(diffs))))
+    exact = np.mean(np.abs(flips @ diffs / len(diffs)) >= observed - 1e-12)
+    reference = stats.permutation_test((diffs,), np.mean, permutation_type='samples', n_resamples=np.inf,
+                                       alternative='two-sided').pvalue
+    assert exact == pytest.approx(reference)
+    assert 0.01 < exact < 0.9
+
+    p_value = significance_table(scores, [('A', 'x'), ('A', 'y')], n_resamples=40000, seed=0)['p_value'][0]
+    # Monte Carlo standard error at 40000 resamples is below 0.0025
+    assert p_value == pytest.approx(exact, abs=0.01)
+
+
+def test_bootstrap_ci_matches_scipy():
+    scores = paired_scores(40, 0.03, seed=4)
+    diffs = scores[:, 0] - scores[:, 1]
+    table = significance_table(scores, [('A', 'x'), ('A', 'y')], n_resamples=40000, confidence=0.9, seed=0)
+    reference = stats.bootstrap((diffs,), np.mean, n_resamples=40000, confidence_level=0.9, method='percentile',
+                                rng=np.random.default_rng(0))
+
+    standard_error = diffs.std(ddof=1) / np.sqrt(len(diffs))
+    assert table['mean_diff'][0] == pytest.approx(diffs.mean())
+    assert table['ci_low'][0] == pytest.approx(reference.confidence_interval.low, abs=0.05 * standard_error)
+    assert table['ci_high'][0] == pytest.approx(reference.confidence_interval.high, abs=0.05 * standard_error)
+
+
+def test_missing_scores_drop_the_title():
+    scores = paired_scores(20, 0.05, seed=5)
+    with_gap = np.vstack([scores, [np.nan, 0.4]])
+    full = significance_table(scores, [('A', 'x'), ('A', 'y')], n_resamples=2000, seed=1)
+    gapped = significance_table(with_gap, [('A', 'x'), ('A', 'y')], n_resamples=2000, seed=1)
+    assert gapped['n'][0] == 20
+    np.testing.assert_array_equal(gapped[['mean_diff', 'ci_low', 'ci_high', 'p_value']].to_numpy(),
+                                  full[['mean_diff', 'ci_low', 'ci_high', 'p_value']].to_numpy())
+
+
+def four_conditions():
+    rng = np.random.default_rng(42)
+    scores = rng.normal(0.5, 0.1, size=(30, 4))
+    scores[:, 1] += 0.03
+    scores[:, 2] += 0.1
+    return scores
+
+
+def test_workers_do_not_change_results():
+    serial = significance_table(four_conditions(), CONDITIONS, n_resamples=5000, seed=0)
+    parallel = significance_table(four_conditions(), CONDITIONS, n_resamples=5000, seed=0, workers=2)
+    np.testing.assert_array_equal(parallel[['ci_low', 'ci_high', 'p_value']].to_numpy(),
+                                  serial[['ci_low', 'ci_high', 'p_value']].to_numpy())
+
+
+def test_seeded_results_are_pinned():
+    # Recorded from the current implementation; a change here changes every published p-value and CI
+    table = significance_table(four_conditions(), CONDITIONS, n_resamples=5000, seed=0)
+    expected = [
+        [-0.034424904097, -0.069804962201, 0.003253781748, 0.087382523495],
+        [-0.137167722035, -0.172292111688, -0.098871651432, 0.000399920016],
+        [-0.021527469589, -0.055856378565, 0.01399054723, 0.248350329934],
+        [-0.102742817938, -0.14674638874, -0.059136842091, 0.000199960008],
+        [0.012897434508, -0.024288079684, 0.048314754026, 0.494701059788],
+        [0.115640252446, 0.082024442213, 0.149759963941, 0.000199960008],
+        [-0.062135143763, -0.090627148536, -0.032717477377, 0.000599880024],
+        [0.040607674175, 0.012923177732, 0.06665275354, 0.00899820036],
+    ]
+    np.testing.assert_allclose(table[['mean_diff', 'ci_low', 'ci_high', 'p_value']].to_numpy(), expected,
+                               rtol=0, atol=1e-11)
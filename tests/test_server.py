@@ -0,0 +1,97 @@
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring.metrics import METRICS, register_metric
+from scoring.server import ScoringClient, ScoringServer
+
+REFERENCES = ['Hero', 'The Wandering Earth', 'Let the Bullets Fly', 'Farewell My Concubine']
+PREDICTIONS = ['Hero', 'Wandering Earth', 'Let Bullets Fly', 'Farewell to My Concubine']
+
+
+@register_metric('failing')
+def failing(table, **options):
+    raise RuntimeError('model exploded')
+
+
+@pytest.fixture
+def server():
+    # A wide batching window so requests sent together from two clients land in the same micro-batch
+    server = ScoringServer('127.0.0.1:0', max_wait_ms=500)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.server.shutdown()
+    thread.join(5)
+
+
+def test_concurrent_clients_share_one_batch(server):
+    halves = [(REFERENCES[:2], PREDICTIONS[:2]), (REFERENCES[2:], PREDICTIONS[2:])]
+    barrier, results = threading.Barrier(2), [None, None]
+
+    def send(i):
+        with ScoringClient(server.address) as client:
+            barrier.wait()
+            results[i] = client.score('psr', *halves[i])['psr']
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    with ScoringClient(server.address) as client:
+        stats = client.stats()
+    assert stats['requests'] == 2 and stats['batches'] == 1 and stats['pairs'] == len(REFERENCES)
+
+    table = pd.DataFrame({'reference': REFERENCES, 'prediction': PREDICTIONS, 'chinese_title': [''] * len(REFERENCES)})
+    expected = np.asarray(METRICS['psr'](table)['psr'], dtype=np.float64)
+    np.testing.assert_allclose(np.concatenate(results), expected)
+
+
+def test_bad_requests_do_not_kill_the_batcher(server):
+    with ScoringClient(server.address) as client:
+        with pytest.raises(RuntimeError, match='Unknown metric'):
+            client.score('no_such_metric', REFERENCES, PREDICTIONS)
+        with pytest.raises(RuntimeError, match='model exploded'):
+            client.score('failing', REFERENCES, PREDICTIONS)
+        with pytest.raises(RuntimeError, match='same length'):
+            client.score('psr', REFERENCES, PREDICTIONS, chinese_titles=['英雄'])
+
+        assert server.batcher.thread.is_alive()
+        assert client.score('psr', REFERENCES[:1], PREDICTIONS[:1])['psr'].tolist() == [1.0]
+
+
+def test_connect_falls_back_when_no_scoring_server_answers():
+    # Nothing listening
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    assert ScoringClient.connect(f'127.0.0.1:{port}') is None
+
+    # Something else listening, answering with a line that is not a scoring server reply
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+
+    def answer():
+        conn, _ = listener.accept()
+        with conn:
+            conn.recv(1024)
+            conn.sendall(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+    thread = threading.Thread(target=answer, daemon=True)
+    thread.start()
+    try:
+        assert ScoringClient.connect('127.0.0.1:%d' % listener.getsockname()[1]) is None
+    finally:
+        thread.join(5)
+        listener.close()
+
+
+def test_connect_returns_a_working_client(server):
+    client = ScoringClient.connect(server.address)
+    assert client is not None
+    with client:
+        assert client.ping()['ok']
@@ -0,0 +1,218 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+# Categories used across the pipeline, so a run's time can be split into waiting on the API,
+# waiting on rate limits, CPU work, model loading and disk
+CATEGORIES = ('http', 'rate_limit', 'model', 'cpu', 'io')
+MAX_SPANS = 200000    # Raw spans kept for the trace files; totals and counters keep counting past this
+
+
+class _NoSpan:
+    # Returned when tracing is off, so instrumented code pays for one attribute check and nothing else
+    def __enter__(self) -> Dict[str, Any]:
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'category', 'attrs', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, attrs: Dict[str, Any]):
+        self.tracer, self.name, self.category, self.attrs = tracer, name, category, attrs
+
+    def __enter__(self) -> Dict[str, Any]:
+        # The attrs dict is handed back so callers can attach results (status codes, row counts) before exit
+        self.start = time.perf_counter()
+        return self.attrs
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter() - self.start, self.attrs)
+        return False
+
+
+class Tracer:
+    # Spans and counters for one process. Spans from process-pool workers (sharded scoring) stay in those workers.
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.origin_wall = time.time()
+        self.spans = []
+        self.dropped = 0
+        self.totals: Dict[tuple, list] = {}      # (name, category) -> [count, seconds]
+        self.counters: Dict[tuple, float] = {}   # (name, sorted labels) -> value
+
+    def span(self, name: str, category: str = 'cpu', **attrs):
+        return _Span(self, name, category, attrs) if self.enabled else _NoSpan()
+
+    def record(self, name: str, category: str, start: float, seconds: float, attrs: Dict[str, Any]):
+        thread = threading.current_thread()
+        with self.lock:
+            total = self.totals.setdefault((name, category), [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append((name, category, start - self.origin, seconds, thread.ident, thread.name, attrs))
+            else:
+                self.dropped += 1
+
+    def count(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def by_category(self) -> Dict[str, float]:
+        # Spans nest and overlap across threads, so categories can add up to more than the wall time
+        with self.lock:
+            totals = list(self.totals.items())
+        out = {}
+        for (_, category), (_, seconds) in totals:
+            out[category] = out.get(category, 0.0) + seconds
+        return out
+
+    def to_json(self) -> Dict[str, Any]:
+        with self.lock:
+            spans, totals, counters = list(self.spans), dict(self.totals), dict(self.counters)
+        return {
+            'started': self.origin_wall,
+            'wall_seconds': round(time.perf_counter() - self.origin, 6),
+            'cpu_seconds': round(time.process_time(), 6),
+            'pid': os.getpid(),
+            'dropped_spans': self.dropped,
+            'by_category': self.by_category(),
+            'totals': [{'name': n, 'category': c, 'count': k, 'seconds': s} for (n, c), (k, s) in totals.items()],
+            'counters': [{'name': n, 'labels': dict(labels), 'value': v} for (n, labels), v in counters.items()],
+            'spans': [{'name': n, 'category': c, 'start': round(t, 6), 'seconds': round(d, 6), 'thread': tid,
+                       'thread_name': tname, 'attrs': attrs} for n, c, t, d, tid, tname, attrs in spans],
+        }
+
+    def to_chrome(self) -> Dict[str, Any]:
+        # Chrome trace event format (chrome://tracing, Perfetto): complete events in microseconds, one row per thread
+        with self.lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events, threads = [], {}
+        for name, category, start, seconds, tid, tname, attrs in spans:
+            threads[tid] = tname
+            events.append({'name': name, 'cat': category, 'ph': 'X', 'ts': round(start * 1e6, 1),
+                           'dur': round(seconds * 1e6, 1), 'pid': pid, 'tid': tid,
+                           'args': {k: v if isinstance(v, (int, float, str, bool)) else str(v) for k, v in attrs.items()}})
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': tname}}
+                   for tid, tname in threads.items()]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def prometheus_text(self) -> str:
+        with self.lock:
+            totals, counters = dict(self.totals), dict(self.counters)
+
+        def labels(pairs):
+            if not pairs:
+                return ''
+            escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in pairs) + '}'
+
+        lines = ['# TYPE span_seconds_total counter']
+        lines += [f"span_seconds_total{labels([('name', n), ('category', c)])} {s:.6f}" for (n, c), (_, s) in totals.items()]
+        lines += ['# TYPE span_count_total counter']
+        lines += [f"span_count_total{labels([('name', n), ('category', c)])} {k}" for (n, c), (k, _) in totals.items()]
+        for name in sorted({n for n, _ in counters}):
+            lines.append(f"# TYPE {name}_total counter")
+            lines += [f"{name}_total{labels(list(l))} {v:g}" for (n, l), v in counters.items() if n == name]
+        lines += ['# TYPE process_cpu_seconds_total counter', f"process_cpu_seconds_total {time.process_time():.6f}",
+                  '# TYPE process_wall_seconds gauge', f"process_wall_seconds {time.perf_counter() - self.origin:.6f}"]
+        return '\n'.join(lines) + '\n'
+
+    def export(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        outputs = {
+            'trace.json': lambda f: json.dump(self.to_json(), f, ensure_ascii=False),
+            'trace.chrome.json': lambda f: json.dump(self.to_chrome(), f, ensure_ascii=False),
+            'metrics.prom': lambda f: f.write(self.prometheus_text()),
+        }
+        for filename, write in outputs.items():
+            path = os.path.join(directory, filename)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                write(f)
+            os.replace(path + '.tmp', path)
+        print(f"Trace written to: {directory} (trace.json, trace.chrome.json, metrics.prom)")
+
+    def print_summary(self):
+        wall, cpu = time.perf_counter() - self.origin, time.process_time()
+        print(f"Wall {wall:.1f}s, process CPU {cpu:.1f}s. Time inside spans by category:")
+        for category, seconds in sorted(self.by_category().items(), key=lambda item: -item[1]):
+            print(f"  {category:<12}{seconds:>10.2f}s")
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        # Prometheus-style scrape endpoint at /metrics, served from a daemon thread for the life of the run
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                data = tracer.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        print(f"Metrics at http://{host}:{httpd.server_address[1]}/metrics")
+        return httpd
+
+
+TRACER = Tracer()
+
+
+def span(name: str, category: str = 'cpu', **attrs):
+    return TRACER.span(name, category, **attrs)
+
+
+def count(name: str, value: float = 1, **labels):
+    TRACER.count(name, value, **labels)
+
+
+def traced(name: Optional[str] = None, category: str = 'cpu') -> Callable:
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(span_name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure(trace_dir: Optional[str] = None, metrics_port: Optional[int] = None):
+    # Tracing stays off (and near free) unless an entry point asks for a trace directory or a metrics port
+    if not trace_dir and metrics_port is None:
+        return
+    TRACER.enabled = True
+    if metrics_port is not None:
+        TRACER.serve(metrics_port)
+
+    def finish():
+        TRACER.print_summary()
+        if trace_dir:
+            TRACER.export(trace_dir)
+    atexit.register(finish)